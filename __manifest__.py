@@ -12,7 +12,13 @@
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
+        'data/fingerprt_hr_cron.xml',
+        'data/fingerprt_hr_import_profile_data.xml',
+        'wizards/fingerprt_hr_import_preview_views.xml',
+        'wizards/fingerprt_hr_import_batch_views.xml',
+        'wizards/fingerprt_hr_mapping_dictionary_views.xml',
         'views/fingerprt_hr_location_views.xml',
+        'views/fingerprt_hr_import_profile_views.xml',
         'views/fingerprt_hr_import_views.xml',
         'views/fingerprt_hr_import_line_views.xml',  
         'views/fingerprt_hr_employee_mapping_views.xml',
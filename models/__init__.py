@@ -1,7 +1,10 @@
 from . import fingerprt_hr_attendance
 from . import fingerprt_hr_attendance_report
 from . import fingerprt_hr_location
+from . import fingerprt_hr_import_profile
 from . import fingerprt_hr_import
 from . import fingerprt_hr_import_line
+from . import fingerprt_hr_import_job
+from . import fingerprt_hr_import_staging
 from . import fingerprt_hr_employee_mapping
 from . import fingerprt_hr_employee
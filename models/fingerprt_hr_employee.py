@@ -1,8 +1,13 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 
+from ..tools.name_matching import EmployeeNameIndex, normalize_name, phonetic_key
+
+# Employee fields the name matching index depends on
+NAME_INDEX_FIELDS = {'name', 'active', 'company_id'}
+
 
 class FingerprtHrEmployee(models.Model):
     _inherit = 'hr.employee'
@@ -14,6 +19,10 @@ class FingerprtHrEmployee(models.Model):
     default_location_id = fields.Many2one('fingerprt_hr.location', string='Default Attendance Location',
                                         help="Employee's default attendance location")
     badge_id = fields.Char(string='Badge ID', help="Employee's unique badge identifier")
+    normalized_name = fields.Char(string='Normalized Name', compute='_compute_normalized_name', store=True, index=True,
+                                  help="Name without accents, punctuation and common words, used to match the names typed on the clocks")
+    phonetic_key = fields.Char(string='Phonetic Key', compute='_compute_phonetic_key', store=True, index=True,
+                               help="Phonetic code of the name, used to match the names typed on the clocks")
     
     # Attendance statistics
     attendance_rate = fields.Float(string='Attendance Rate', compute='_compute_attendance_stats', store=True)
@@ -21,6 +30,57 @@ class FingerprtHrEmployee(models.Model):
     total_late_count = fields.Integer(string='Number of Late Arrivals', compute='_compute_attendance_stats', store=True)
     total_early_leave_count = fields.Integer(string='Number of Early Departures', compute='_compute_attendance_stats', store=True)
     
+    @api.depends('name')
+    def _compute_normalized_name(self):
+        for employee in self:
+            employee.normalized_name = normalize_name(employee.name) or False
+
+    @api.depends('name')
+    def _compute_phonetic_key(self):
+        for employee in self:
+            employee.phonetic_key = phonetic_key(employee.name) or False
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super(FingerprtHrEmployee, self).create(vals_list)
+        self._build_name_index.clear_cache(self)
+        return employees
+
+    def _changes_name_index(self, vals):
+        """Return whether writing the values changes the name, the activity or the company of an employee"""
+        for field_name in NAME_INDEX_FIELDS.intersection(vals):
+            field = self._fields[field_name]
+            for employee in self:
+                if (field.convert_to_write(employee[field_name], employee) or False) != (vals[field_name] or False):
+                    return True
+        return False
+
+    def write(self, vals):
+        changes_name_index = self._changes_name_index(vals)
+        res = super(FingerprtHrEmployee, self).write(vals)
+        if changes_name_index:
+            self._build_name_index.clear_cache(self)
+        return res
+
+    def unlink(self):
+        res = super(FingerprtHrEmployee, self).unlink()
+        self._build_name_index.clear_cache(self)
+        return res
+
+    @api.model
+    def _get_name_index(self):
+        """Return the name matching index of the active employees of the current companies"""
+        return self._build_name_index(tuple(sorted(self.env.companies.ids)))
+
+    @api.model
+    @tools.ormcache('company_ids')
+    def _build_name_index(self, company_ids):
+        """Build the name matching index once per registry, until an employee name changes"""
+        employees = self.sudo().with_context(active_test=True).search_read(
+            [('company_id', 'in', list(company_ids) + [False])], ['name', 'normalized_name'])
+        return EmployeeNameIndex(
+            (employee['id'], employee['name'], employee['normalized_name']) for employee in employees)
+
     @api.depends('attendance_ids')
     def _compute_attendance_stats(self):
         """Compute attendance statistics"""
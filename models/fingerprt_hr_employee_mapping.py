@@ -2,6 +2,8 @@ from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 import logging
 
+from ..tools.name_matching import normalize_name, phonetic_key
+
 _logger = logging.getLogger(__name__)
 
 class FingerprtHrEmployeeMapping(models.Model):
@@ -14,8 +16,15 @@ class FingerprtHrEmployeeMapping(models.Model):
     last_used = fields.Datetime(string='Last Used', default=fields.Datetime.now)
     import_count = fields.Integer(string='Import Count', default=1)
     import_id = fields.Many2one('fingerprt_hr.import', string='Source Import')
-    import_ids = fields.Many2many('fingerprt_hr.import', string='Imports', compute='_compute_import_ids')
+    import_ids = fields.Many2many('fingerprt_hr.import', 'fingerprt_hr_employee_mapping_import_rel', 'mapping_id',
+                                  'import_id', string='Imports', readonly=True, copy=False,
+                                  help="Imports with lines mapped to the employee under this name")
     active = fields.Boolean(string='Active', default=True)
+    notes = fields.Text(string='Notes')
+    normalized_name = fields.Char(string='Normalized Name', compute='_compute_normalized_name', store=True, index=True,
+                                  help="Imported name without accents, punctuation and common words")
+    phonetic_key = fields.Char(string='Phonetic Key', compute='_compute_phonetic_key', store=True, index=True,
+                               help="Phonetic code of the imported name, to reuse the mapping for its spelling variants")
 
     _sql_constraints = [
         ('unique_name_active', 'unique(name, active)',
@@ -24,87 +33,218 @@ class FingerprtHrEmployeeMapping(models.Model):
          'This employee already has an active name mapping!')
     ]
 
+    def init(self):
+        # Fill the relation once from the existing lines, it is then kept up to date as lines are mapped
+        self.env.cr.execute("SELECT 1 FROM fingerprt_hr_employee_mapping_import_rel LIMIT 1")
+        if not self.env.cr.fetchone():
+            self.env.cr.execute("""
+                INSERT INTO fingerprt_hr_employee_mapping_import_rel (mapping_id, import_id)
+                SELECT DISTINCT m.id, l.import_id
+                FROM fingerprt_hr_import_line l
+                JOIN fingerprt_hr_employee_mapping m ON m.name = l.employee_name AND m.employee_id = l.employee_id
+                ON CONFLICT DO NOTHING
+            """)
+
+    @api.depends('name')
+    def _compute_normalized_name(self):
+        for record in self:
+            record.normalized_name = normalize_name(record.name) or False
+
+    @api.depends('name')
+    def _compute_phonetic_key(self):
+        for record in self:
+            record.phonetic_key = phonetic_key(record.name) or False
+
     @api.constrains('name', 'employee_id', 'active')
     def _check_unique_constraints(self):
-        """Additional check to prevent duplicates"""
-        for record in self:
-            if not record.active:
-                continue  # Ignore inactive records
-                
-            # Check if another active record exists with the same name
-            same_name = self.search([
-                ('id', '!=', record.id),
-                ('name', '=', record.name),
-                ('active', '=', True)
-            ], limit=1)
-            
+        """Additional check to prevent duplicates, with one query for all the records"""
+        records = self.filtered('active')  # Ignore inactive records
+        if not records:
+            return
+        self.flush(['name', 'employee_id', 'active'])
+        # Other active records with the same name first, then with the same employee
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (m.id) m.id, o.id, o.name = m.name
+            FROM fingerprt_hr_employee_mapping m
+            JOIN fingerprt_hr_employee_mapping o
+              ON o.id != m.id AND o.active AND (o.name = m.name OR o.employee_id = m.employee_id)
+            WHERE m.id IN %s AND m.active
+            ORDER BY m.id, (o.name = m.name) DESC, o.id
+        """, (tuple(records.ids),))
+        duplicates = {record_id: (other_id, same_name) for record_id, other_id, same_name in self.env.cr.fetchall()}
+        for record in records:
+            if record.id not in duplicates:
+                continue
+            other_id, same_name = duplicates[record.id]
+            other = self.browse(other_id)
             if same_name:
                 raise ValidationError(_(
                     "An active mapping already exists for name '%s' (associated with employee %s)."
-                ) % (record.name, same_name.employee_id.name))
-            
-            # Check if another active record exists for the same employee
-            same_employee = self.search([
-                ('id', '!=', record.id),
-                ('employee_id', '=', record.employee_id.id),
-                ('active', '=', True)
-            ], limit=1)
-            
-            if same_employee:
-                raise ValidationError(_(
-                    "Employee %s already has an active mapping with name '%s'."
-                ) % (record.employee_id.name, same_employee.name))
+                ) % (record.name, other.employee_id.name))
+            raise ValidationError(_(
+                "Employee %s already has an active mapping with name '%s'."
+            ) % (record.employee_id.name, other.name))
 
     @api.model_create_multi
     def create(self, vals_list):
-        """Override creation to check for duplicates and log"""
-        result = self.env['fingerprt_hr.employee.mapping']
-        
+        """Override creation to check for duplicates and log.
+
+        The existing mappings of all the names and employees of the batch are
+        read with two queries. Names or employees already mapped are
+        skipped, matching inactive mappings are reactivated and the other
+        mappings are created with a single insert.
+        """
+        names = list({vals.get('name') for vals in vals_list if vals.get('name')})
+        employee_ids = list({vals.get('employee_id') for vals in vals_list if vals.get('employee_id')})
+
+        # Active mappings of the names or the employees
+        mapped_names = {}
+        mapped_employees = {}
+        for mapping in self.search_read([
+            '|', ('name', 'in', names), ('employee_id', 'in', employee_ids),
+            ('active', '=', True)
+        ], ['name', 'employee_id']):
+            mapped_names.setdefault(mapping['name'], mapping['id'])
+            mapped_employees.setdefault(mapping['employee_id'][0], mapping['name'])
+
+        # Inactive mappings of the combinations
+        inactive_mappings = {}
+        for mapping in self.with_context(active_test=False).search([
+            ('name', 'in', names),
+            ('employee_id', 'in', employee_ids),
+            ('active', '=', False)
+        ]):
+            inactive_mappings.setdefault((mapping.name, mapping.employee_id.id), mapping)
+
+        results = []
+        reactivated = self.browse()
+        create_vals = []
         for vals in vals_list:
-            _logger.info("Creating mapping: %s -> %s", 
-                        vals.get('name'), vals.get('employee_id'))
-            
+            name = vals.get('name')
+            employee_id = vals.get('employee_id')
+            _logger.info("Creating mapping: %s -> %s", name, employee_id)
+
             # Check if a mapping with the same name already exists
-            existing_name = self.search([
-                ('name', '=', vals.get('name')),
-                ('active', '=', True)
-            ], limit=1)
-            
-            if existing_name:
-                _logger.warning("An active mapping already exists for name '%s'", vals.get('name'))
+            if name in mapped_names:
+                _logger.warning("An active mapping already exists for name '%s'", name)
                 continue
-                
+
             # Check if the employee already has an active mapping
-            existing_employee = self.search([
-                ('employee_id', '=', vals.get('employee_id')),
-                ('active', '=', True)
-            ], limit=1)
-            
-            if existing_employee:
-                _logger.warning("Employee already has an active mapping with name '%s'", existing_employee.name)
+            if employee_id in mapped_employees:
+                _logger.warning("Employee already has an active mapping with name '%s'", mapped_employees[employee_id])
                 continue
-                
+            mapped_names[name] = True
+            mapped_employees[employee_id] = name
+
             # Check if an inactive mapping exists for this combination
-            inactive = self.search([
-                ('name', '=', vals.get('name')),
-                ('employee_id', '=', vals.get('employee_id')),
-                ('active', '=', False)
-            ], limit=1)
-            
+            inactive = inactive_mappings.get((name, employee_id))
             if inactive:
                 _logger.info("Reactivating existing mapping")
-                inactive.write({
-                    'active': True,
-                    'import_count': inactive.import_count + 1,
-                    'last_used': fields.Datetime.now()
-                })
-                result |= inactive
+                reactivated |= inactive
+                results.append(inactive)
             else:
-                # Create a new mapping
-                record = super(FingerprtHrEmployeeMapping, self).create([vals])[0]
-                result |= record
-                
-        return result
+                results.append(len(create_vals))
+                create_vals.append(vals)
+
+        if reactivated:
+            reactivated.write({'active': True})
+            self._add_usage({mapping.id: 1 for mapping in reactivated})
+        created = super(FingerprtHrEmployeeMapping, self).create(create_vals) if create_vals else self.browse()
+        return self.browse([
+            created[result].id if isinstance(result, int) else result.id for result in results
+        ])
+
+    def write(self, vals):
+        res = super(FingerprtHrEmployeeMapping, self).write(vals)
+        if self and ('name' in vals or 'employee_id' in vals):
+            # The lines of the former name or employee no longer belong to these mappings
+            self.flush(['name', 'employee_id'])
+            self.env.cr.execute(
+                "DELETE FROM fingerprt_hr_employee_mapping_import_rel WHERE mapping_id IN %s", (tuple(self.ids),))
+            self._link_imports(mapping_ids=self.ids)
+        return res
+
+    @api.model
+    def _link_imports(self, line_ids=None, import_ids=None, mapping_ids=None):
+        """Add the imports of the mapped lines to the relation of their mapping, with one statement.
+
+        A line belongs to the mapping of its imported name and employee. The
+        lines are selected by id, by import or by mapping.
+        """
+        if line_ids:
+            where, params = "l.id IN %s", (tuple(line_ids),)
+        elif import_ids:
+            where, params = "l.import_id IN %s", (tuple(import_ids),)
+        elif mapping_ids:
+            where, params = "m.id IN %s", (tuple(mapping_ids),)
+        else:
+            return
+        self.env['fingerprt_hr.import.line'].flush(['import_id', 'employee_name', 'employee_id'])
+        self.flush(['name', 'employee_id'])
+        self.env.cr.execute("""
+            INSERT INTO fingerprt_hr_employee_mapping_import_rel (mapping_id, import_id)
+            SELECT DISTINCT m.id, l.import_id
+            FROM fingerprt_hr_import_line l
+            JOIN fingerprt_hr_employee_mapping m ON m.name = l.employee_name AND m.employee_id = l.employee_id
+            WHERE %s
+            ON CONFLICT DO NOTHING
+        """ % where, params)
+        if self.env.cr.rowcount:
+            self.invalidate_cache(['import_ids'])
+
+    @api.model
+    def _unlink_imports(self, line_ids):
+        """Remove the imports of lines about to lose their mapping from the relation, with one statement.
+
+        To be called before the employee or the name of the lines change, or
+        before they are deleted. An import is kept for a mapping as long as
+        other lines of the import still belong to it.
+        """
+        if not line_ids:
+            return
+        self.env['fingerprt_hr.import.line'].flush(['import_id', 'employee_name', 'employee_id'])
+        self.flush(['name', 'employee_id'])
+        self.env.cr.execute("""
+            DELETE FROM fingerprt_hr_employee_mapping_import_rel r
+            USING (
+                SELECT DISTINCT m.id AS mapping_id, m.name, m.employee_id, l.import_id
+                FROM fingerprt_hr_import_line l
+                JOIN fingerprt_hr_employee_mapping m ON m.name = l.employee_name AND m.employee_id = l.employee_id
+                WHERE l.id IN %(line_ids)s
+            ) u
+            WHERE r.mapping_id = u.mapping_id AND r.import_id = u.import_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM fingerprt_hr_import_line o
+                  WHERE o.import_id = u.import_id AND o.employee_name = u.name
+                    AND o.employee_id = u.employee_id AND o.id NOT IN %(line_ids)s
+              )
+        """, {'line_ids': tuple(line_ids)})
+        if self.env.cr.rowcount:
+            self.invalidate_cache(['import_ids'])
+
+    @api.model
+    def _add_usage(self, usage):
+        """Add usage counts {mapping id: number of lines} to the mappings with one aggregated UPDATE"""
+        usage = {mapping_id: count for mapping_id, count in usage.items() if mapping_id and count}
+        if not usage:
+            return
+        self.flush(['import_count', 'last_used'])
+        now = fields.Datetime.now()
+        mapping_ids = sorted(usage)
+        # Lock the rows in id order first, the UPDATE does not lock them in any given order,
+        # so that concurrent imports cannot deadlock
+        self.env.cr.execute(
+            "SELECT id FROM fingerprt_hr_employee_mapping WHERE id = ANY(%s) ORDER BY id FOR UPDATE", (mapping_ids,))
+        self.env.cr.execute("""
+            UPDATE fingerprt_hr_employee_mapping m
+            SET import_count = m.import_count + u.line_count,
+                last_used = %s, write_uid = %s, write_date = %s
+            FROM (
+                SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS line_count
+            ) u
+            WHERE m.id = u.id
+        """, (now, self.env.uid, now, mapping_ids, [usage[mapping_id] for mapping_id in mapping_ids]))
+        self.invalidate_cache(['import_count', 'last_used', 'write_uid', 'write_date'], mapping_ids)
 
     def name_get(self):
         return [(rec.id, f"{rec.name} → {rec.employee_id.name}") for rec in self]
@@ -179,15 +319,6 @@ class FingerprtHrEmployeeMapping(models.Model):
             }
         }
         
-    def _compute_import_ids(self):
-        """Compute all imports where this mapping was used"""
-        for rec in self:
-            import_lines = self.env['fingerprt_hr.import.line'].search([
-                ('employee_name', '=', rec.name),
-                ('employee_id', '=', rec.employee_id.id)
-            ])
-            rec.import_ids = import_lines.mapped('import_id')
-            
     def action_view_imports(self):
         """View imports where this mapping was used"""
         self.ensure_one()
@@ -1,17 +1,34 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
-import base64
-import csv
+import hashlib
 import io
 import logging
-import re
-from datetime import datetime, timedelta, time
+from datetime import datetime
 import pytz
-import difflib
-import unicodedata
+from collections import Counter, defaultdict
+
+from ..tools.clock_parser import ClockDateTimeParser
+from ..tools.clock_rows import DEFAULT_PROFILE_SPEC, iter_clock_rows
+from ..tools.file_stream import (
+    CHUNK_SIZE, Base64ChunkReader, is_clock_file_name, open_decompressed_stream
+)
+from ..tools.name_matching import (
+    MATCH_THRESHOLD, PARALLEL_MATCH_MIN_NAMES, PHONETIC_MATCH_THRESHOLD, best_matches, is_name_too_short,
+    normalize_name, phonetic_key, similarity_score, token_sort_score
+)
+from ..tools.row_buffer import ClockRowBuffer
 
 _logger = logging.getLogger(__name__)
 
+# Number of lines created per ORM call while streaming a file
+IMPORT_BATCH_SIZE = 1000
+
+# Number of parse errors detailed by an import preview
+PREVIEW_MAX_ERRORS = 20
+
+# Number of names listed with suggestions by the mapping report
+REPORT_MAX_SUGGESTIONS = 50
+
 class FingerprtHrImport(models.Model):
     _name = 'fingerprt_hr.import'
     _description = 'Import Physical Time Clock Data'
@@ -21,12 +38,32 @@ class FingerprtHrImport(models.Model):
     name = fields.Char(string='Name', required=True, default=lambda self: self._get_default_name())
     file = fields.Binary(string='File CSV', required=True)
     file_name = fields.Char(string='File Name')
+    file_checksum = fields.Char(string='File Checksum', readonly=True, copy=False, index=True)
     location_id = fields.Many2one('fingerprt_hr.location', string='Location')
+    profile_id = fields.Many2one('fingerprt_hr.import.profile', string='File Format',
+                                 default=lambda self: self._get_default_profile(),
+                                 help="Layout of the clock export, the standard clock layout if empty")
+    import_mode = fields.Selection([
+        ('full', 'Full'),
+        ('delta', 'Delta (new rows only)')
+    ], string='Import Mode', default='full', required=True,
+        help="A delta import skips the rows older than the last check-in imported for the location, "
+             "for clocks exporting their whole history each time.")
+    load_method = fields.Selection([
+        ('orm', 'Standard'),
+        ('copy', 'Fast load (trusted files)'),
+        ('staging', 'Staging pipeline (trusted files)')
+    ], string='Load Method', default='orm', required=True,
+        help="Fast load inserts the lines with a PostgreSQL COPY. The staging pipeline also maps the "
+             "employees and creates the attendances with set-based SQL statements. Only use them for "
+             "trusted clock files: the lines are only checked for a check-out earlier than the check-in.")
     import_date = fields.Datetime(string='Import Date', readonly=True)
     user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user, readonly=True)
     line_count = fields.Integer(string='Number of Lines', compute='_compute_line_count')
     attendance_count = fields.Integer(string='Number of Attendances', compute='_compute_attendance_count')
     notes = fields.Text(string='Notes', tracking=True)
+    import_row_cursor = fields.Integer(string='Last Committed Row', readonly=True, copy=False,
+                                       help="Last CSV row committed by the import, used to resume a failed import")
     
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -37,6 +74,14 @@ class FingerprtHrImport(models.Model):
     ], string='State', default='draft', required=True, tracking=True)
 
     line_ids = fields.One2many('fingerprt_hr.import.line', 'import_id', string='Imported Lines')
+    job_ids = fields.One2many('fingerprt_hr.import.job', 'import_id', string='Background Jobs')
+    job_running = fields.Boolean(string='Job Running', compute='_compute_job_running')
+
+    # Progress of the import, updated as the stages run
+    progress_parsed = fields.Integer(string='Rows Parsed', readonly=True, copy=False)
+    progress_mapped = fields.Integer(string='Lines Mapped', readonly=True, copy=False)
+    progress_created = fields.Integer(string='Attendances Created', readonly=True, copy=False)
+    progress_errors = fields.Integer(string='Errors', readonly=True, copy=False)
 
     @api.depends('line_ids')
     def _compute_line_count(self):
@@ -48,12 +93,25 @@ class FingerprtHrImport(models.Model):
         for record in self:
             record.attendance_count = len(record.line_ids.filtered(lambda l: l.attendance_id))
 
+    @api.depends('job_ids.state')
+    def _compute_job_running(self):
+        for record in self:
+            record.job_running = any(job.state in ['pending', 'running'] for job in record.job_ids)
+
+    @api.constrains('import_mode', 'location_id')
+    def _check_delta_location(self):
+        """A delta import needs a location to know its last imported check-in"""
+        for record in self:
+            if record.import_mode == 'delta' and not record.location_id:
+                raise ValidationError(_("A location is required for a delta import."))
+
     @api.constrains('file_name')
     def _check_file_extension(self):
-        """Check that the file is a CSV"""
+        """Check that the file is a clock export, possibly compressed with gzip or zstandard"""
         for record in self:
-            if record.file_name and not record.file_name.lower().endswith('.csv'):
-                raise ValidationError(_("Only CSV files are accepted."))
+            if record.file_name and not is_clock_file_name(record.file_name):
+                raise ValidationError(_("Only clock exports (.csv, .tsv, .txt, .xlsx, "
+                                        "possibly compressed as .gz or .zst) are accepted."))
 
     def _convert_to_float(self, value):
         """Convert a value to float with special case handling"""
@@ -102,78 +160,14 @@ class FingerprtHrImport(models.Model):
 
     def _convert_to_datetime(self, date_str, time_str):
         """Convert a date (mm/dd/yy) and time (HH:MMa/p) to datetime"""
-        
         if not date_str or not time_str:
             _logger.error("Date or time missing")
             return False
-            
-        try:
-            # Convert date
-            date = datetime.strptime(date_str, '%m/%d/%y').date()
-            
-            # Convert time from 12h to 24h
-            time_str = time_str.strip()
-            if not time_str or len(time_str) < 2:
-                _logger.error("Invalid time string")
-                return False
-                
-            # Check AM/PM marker
-            am_pm = time_str[-1].lower()
-            if am_pm not in ['a', 'p']:
-                _logger.error("Invalid AM/PM marker: %s", time_str[-1])
-                return False
-                
-            # Extract hours and minutes
-            time_parts = time_str[:-1].split(':')
-            if len(time_parts) != 2:
-                _logger.error("Invalid time format: %s", time_str)
-                return False
-                
-            hours = int(time_parts[0])
-            minutes = int(time_parts[1])
-            _logger.info("Time extracted: %d:%02d %s", hours, minutes, am_pm)
-            
-            # Convert to 24h format
-            if am_pm == 'p' and hours < 12:
-                hours += 12
-            elif am_pm == 'a' and hours == 12:
-                hours = 0
-                
-            _logger.info("Time in 24h format: %d:%02d", hours, minutes)
-            
-            # Create datetime
-            result = datetime.combine(date, time(hours, minutes))
-            _logger.info("Final result: %s", result)
-            return result
-            
-        except Exception as e:
-            _logger.error("Conversion error: %s", str(e))
-            return False
+        return ClockDateTimeParser().combine(date_str, time_str) or False
 
     def _normalize_name(self, name):
         """Normalize a name for comparison"""
-        if not name:
-            return ""
-            
-        # Convert to lowercase
-        name = name.lower()
-        
-        # Remove accents
-        name = ''.join(c for c in unicodedata.normalize('NFD', name)
-                      if unicodedata.category(c) != 'Mn')
-        
-        # Remove special characters and digits
-        name = re.sub(r'[^a-z ]', '', name)
-        
-        # Remove multiple spaces
-        name = re.sub(r'\s+', ' ', name).strip()
-        
-        # Remove common words and short words
-        common_words = ['le', 'la', 'les', 'de', 'du', 'des', 'un', 'une', 'et', 'a', 'au', 'aux']
-        words = name.split()
-        words = [w for w in words if w not in common_words and len(w) > 1]
-        
-        return ' '.join(words)
+        return normalize_name(name)
 
     def _find_employee_by_name(self, employee_name):
         """Find an employee by name using existing mappings or searching in employees"""
@@ -188,91 +182,223 @@ class FingerprtHrImport(models.Model):
         
         if mapping:
             # Update usage counter
-            mapping.write({
-                'import_count': mapping.import_count + 1,
-                'last_used': fields.Datetime.now()
-            })
+            self.env['fingerprt_hr.employee.mapping']._add_usage({mapping.id: 1})
             return mapping.employee_id
-        
+        return self._match_employee_name(employee_name)
+
+    def _match_employee_name(self, employee_name, usage=None, line_count=1, with_mapping=False):
+        """Search an employee for a name without mapping and create the mapping of the match.
+
+        Exact and normalized names are looked up first. Otherwise the
+        candidates sharing the phonetic key of the name, mapped names or
+        employees, compete with the best similarity match: the highest score
+        wins, a phonetic candidate needing PHONETIC_MATCH_THRESHOLD and the
+        similarity match MATCH_THRESHOLD. The `line_count` uses of a reused
+        mapping are added to the `usage` counter if given, to the mapping
+        otherwise. With `with_mapping`, return (employee, mapping) where the
+        mapping is the reused or created one, empty if none could be created.
+        """
+        Mapping = self.env['fingerprt_hr.employee.mapping']
+        Employee = self.env['hr.employee']
+        no_match = (False, Mapping) if with_mapping else False
+
         # Normalize the imported name for comparison
-        normalized_name = self._normalize_name(employee_name)
-        
-        # Check if the name is too short or could be just a first name/last name
-        words = normalized_name.split()
+        normalized_name = normalize_name(employee_name)
         
         # If the normalized name is empty or contains a single short word, do not perform automatic matching
-        if not normalized_name or (len(words) == 1 and len(normalized_name) < 5):
+        if is_name_too_short(normalized_name):
             _logger.info("Name too short or incomplete for automatic matching: '%s'", employee_name)
-            return False
-        
-        # 2. Search for an employee with the exact name
-        employee = self.env['hr.employee'].search([
+            return no_match
+
+        def reuse(mapping):
+            if usage is None:
+                Mapping._add_usage({mapping.id: line_count})
+            else:
+                usage[mapping.id] += line_count
+            _logger.info("Mapping of a variant found for '%s': '%s'", employee_name, mapping.name)
+            return (mapping.employee_id, mapping) if with_mapping else mapping.employee_id
+
+        def variant_of(domain):
+            """Return the first of the mappings of the domain if they all lead to the same employee"""
+            mappings = Mapping.search(domain + [('active', '=', True)])
+            if len(mappings.employee_id) == 1:
+                return mappings[0]
+            return Mapping
+
+        # 1. Search for an employee with the exact name, then a mapped name or
+        # an employee with the same normalized name
+        employee = Employee.search([
             ('name', '=', employee_name),
             ('active', '=', True)
         ], limit=1)
-        
-        if employee:
-            # Create a mapping
-            try:
-                self.env['fingerprt_hr.employee.mapping'].create({
-                    'name': employee_name,
-                    'employee_id': employee.id,
-                    'import_id': self.id
-                })
-            except Exception as e:
-                _logger.error("Error creating mapping: %s", str(e))
-            return employee
-        
-        # 3. Search by similarity if no exact match is found
-        # Get all active employees
-        all_employees = self.env['hr.employee'].search([('active', '=', True)])
-        
-        # Prepare normalized employee names
-        employee_names = [(emp, self._normalize_name(emp.name)) for emp in all_employees]
-        
-        best_match = None
-        best_score = 0.0
-        threshold = 0.85  # Similarity threshold (85%)
-        
-        for emp, emp_normalized_name in employee_names:
-            # Check that the employee name contains at least two words
-            emp_words = emp_normalized_name.split()
-            if len(emp_words) < 2:
+        best_score = 1.0
+        if not employee:
+            variant = variant_of([('normalized_name', '=', normalized_name)])
+            if variant:
+                return reuse(variant)
+            employee = Employee.search([
+                ('normalized_name', '=', normalized_name),
+                ('active', '=', True)
+            ], limit=1)
+
+        if not employee:
+            # 2. Candidates with the same phonetic key, mapped names first
+            name_key = phonetic_key(employee_name)
+            best_score = 0.0
+            variant = variant_of([('phonetic_key', '=', name_key)])
+            if variant:
+                best_score = token_sort_score(normalized_name, variant.normalized_name or '')
+                if best_score < PHONETIC_MATCH_THRESHOLD:
+                    variant, best_score = Mapping, 0.0
+            for candidate in Employee.search([
+                ('phonetic_key', '=', name_key),
+                ('active', '=', True)
+            ]):
+                score = token_sort_score(normalized_name, candidate.normalized_name or '')
+                if score >= PHONETIC_MATCH_THRESHOLD and score > best_score:
+                    variant, employee, best_score = Mapping, candidate, score
+
+            # 3. Best similarity match, among the candidates of the normalized
+            # names precomputed for the registry
+            name_index = Employee._get_name_index()
+            best_match_id, score = name_index.best_match(normalized_name, MATCH_THRESHOLD)
+            if best_match_id and score >= MATCH_THRESHOLD and score > best_score:
+                variant, employee, best_score = Mapping, Employee.browse(best_match_id), score
+
+            if variant:
+                return reuse(variant)
+            if not employee:
+                return no_match
+
+        # Create the mapping of the match
+        mapping = Mapping
+        vals = {
+            'name': employee_name,
+            'employee_id': employee.id,
+            'import_id': self.id
+        }
+        if best_score < 1.0:
+            vals['notes'] = _("Automatic matching (score: %.2f)") % best_score
+        try:
+            mapping = Mapping.create(vals)
+            if best_score < 1.0:
+                _logger.info("Automatic matching found for '%s': '%s' (score: %.2f)",
+                             employee_name, employee.name, best_score)
+        except Exception as e:
+            _logger.error("Error creating mapping: %s", str(e))
+        return (employee, mapping) if with_mapping else employee
+
+    def _match_employee_names(self, line_counts, usage):
+        """Batch version of _match_employee_name, for many names without mapping.
+
+        The variants of mapped names and the exact and phonetic matches are
+        read with two queries, the names without exact match are scored on
+        all cores against a snapshot of the employee names, with the same
+        precedence as _match_employee_name. The mappings of the matches are
+        then created in one batch. Return a dict giving the employee of
+        each matched name.
+        """
+        Mapping = self.env['fingerprt_hr.employee.mapping']
+        normalized_names = {}
+        for name in line_counts:
+            normalized_name = normalize_name(name)
+            if is_name_too_short(normalized_name):
+                _logger.info("Name too short or incomplete for automatic matching: '%s'", name)
                 continue
-                
-            # Calculate similarity between names
-            similarity = difflib.SequenceMatcher(None, normalized_name, emp_normalized_name).ratio()
-            
-            # Check also if the imported name is contained in the employee name or vice versa
-            contains_score = 0
-            if normalized_name in emp_normalized_name:
-                contains_score = len(normalized_name) / len(emp_normalized_name)
-            elif emp_normalized_name in normalized_name:
-                contains_score = len(emp_normalized_name) / len(normalized_name)
-            
-            # Take the best score between similarity and contains score
-            final_score = max(similarity, contains_score)
-            
-            if final_score > best_score:
-                best_score = final_score
-                best_match = emp
-        
-        # If a match with a sufficient score is found, create a mapping
-        if best_match and best_score >= threshold:
+            normalized_names[name] = normalized_name
+        if not normalized_names:
+            return {}
+        name_keys = {name: phonetic_key(name) for name in normalized_names}
+        all_normalized = list(set(normalized_names.values()))
+        all_keys = list({key for key in name_keys.values() if key})
+
+        # Mappings of the spelling variants, grouped in search order
+        variants = defaultdict(list)
+        for mapping in Mapping.search_read([
+            '|', ('normalized_name', 'in', all_normalized), ('phonetic_key', 'in', all_keys),
+            ('active', '=', True)
+        ], ['name', 'normalized_name', 'phonetic_key', 'employee_id']):
+            variants['normalized_name', mapping['normalized_name']].append(mapping)
+            variants['phonetic_key', mapping['phonetic_key']].append(mapping)
+
+        # Employees with the same name, normalized name or phonetic key
+        by_name = {}
+        by_normalized_name = {}
+        by_key = defaultdict(list)
+        for employee in self.env['hr.employee'].search_read([
+            '|', '|', ('name', 'in', list(normalized_names)), ('normalized_name', 'in', all_normalized),
+            ('phonetic_key', 'in', all_keys),
+            ('active', '=', True)
+        ], ['name', 'normalized_name', 'phonetic_key']):
+            by_name.setdefault(employee['name'], employee['id'])
+            by_normalized_name.setdefault(employee['normalized_name'], employee['id'])
+            by_key[employee['phonetic_key']].append(employee)
+
+        def variant_of(group):
+            if len({mapping['employee_id'][0] for mapping in group}) == 1:
+                return group[0]
+            return None
+
+        def reuse(name, variant):
+            usage[variant['id']] += line_counts[name]
+            matches[name] = variant['employee_id'][0]
+
+        def propose(name, employee_id, score):
+            matches[name] = employee_id
+            vals = {'name': name, 'employee_id': employee_id, 'import_id': self.id}
+            if score < 1.0:
+                vals['notes'] = _("Automatic matching (score: %.2f)") % score
+            mapping_vals.append(vals)
+
+        # Exact names, then mapped names and employees with the same normalized name
+        matches = {}
+        mapping_vals = []
+        to_score = []
+        for name, normalized_name in normalized_names.items():
+            variant = variant_of(variants['normalized_name', normalized_name])
+            if name in by_name:
+                propose(name, by_name[name], 1.0)
+            elif variant:
+                reuse(name, variant)
+            elif normalized_name in by_normalized_name:
+                propose(name, by_normalized_name[normalized_name], 1.0)
+            else:
+                to_score.append(name)
+
+        # Phonetic candidates and best similarity match of the other names,
+        # the similarity is scored in parallel
+        name_index = self.env['hr.employee']._get_name_index()
+        scores = best_matches([normalized_names[name] for name in to_score], name_index, MATCH_THRESHOLD)
+        for name, (best_match_id, match_score) in zip(to_score, scores):
+            normalized_name = normalized_names[name]
+            key = name_keys[name]
+            best_variant, best_id, best_score = None, None, 0.0
+            variant = variant_of(variants['phonetic_key', key]) if key else None
+            if variant:
+                score = token_sort_score(normalized_name, variant['normalized_name'] or '')
+                if score >= PHONETIC_MATCH_THRESHOLD:
+                    best_variant, best_score = variant, score
+            for employee in by_key[key] if key else ():
+                score = token_sort_score(normalized_name, employee['normalized_name'] or '')
+                if score >= PHONETIC_MATCH_THRESHOLD and score > best_score:
+                    best_variant, best_id, best_score = None, employee['id'], score
+            if best_match_id and match_score >= MATCH_THRESHOLD and match_score > best_score:
+                best_variant, best_id, best_score = None, best_match_id, match_score
+
+            if best_variant:
+                reuse(name, best_variant)
+            elif best_id:
+                propose(name, best_id, best_score)
+        _logger.info("Batch matching: %d names matched out of %d, %d scored by similarity",
+                     len(matches), len(line_counts), len(to_score))
+
+        if mapping_vals:
             try:
-                self.env['fingerprt_hr.employee.mapping'].create({
-                    'name': employee_name,
-                    'employee_id': best_match.id,
-                    'import_id': self.id,
-                    'notes': _("Automatic matching (score: %.2f)") % best_score
-                })
-                _logger.info("Automatic matching found for '%s': '%s' (score: %.2f)", 
-                             employee_name, best_match.name, best_score)
-                return best_match
+                with self.env.cr.savepoint():
+                    Mapping.create(mapping_vals)
             except Exception as e:
-                _logger.error("Error creating matching: %s", str(e))
-        
-        return False
+                _logger.error("Error creating mappings: %s", str(e))
+        return {name: self.env['hr.employee'].browse(employee_id) for name, employee_id in matches.items()}
 
     def message_post(self, **kwargs):
         """Override to format dates in user's timezone"""
@@ -287,106 +413,338 @@ class FingerprtHrImport(models.Model):
         
         return super(FingerprtHrImport, self).message_post(**kwargs)
 
-    def _import_csv_file(self):
-        """Import CSV data"""
+    def _get_file_attachment(self):
+        """Return the attachment storing the file of the import"""
         self.ensure_one()
-        _logger.info("=== START IMPORT ===")
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'file')
+        ], limit=1)
 
-        if not self.file:
-            raise UserError(_("Please select a file to import."))
+    def _get_file_checksum(self):
+        """Return the SHA1 checksum of the stored file"""
+        self.ensure_one()
+        attachment = self._get_file_attachment()
+        if attachment.checksum:
+            return attachment.checksum
+            
+        checksum = hashlib.sha1()
+        with self._open_file_stream() as stream:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def _check_duplicate_file(self):
+        """Refuse a file identical to the one of another import"""
+        self.ensure_one()
+        checksum = self._get_file_checksum()
+        duplicate = self.search([
+            ('id', '!=', self.id),
+            ('file_checksum', '=', checksum),
+            ('state', 'in', ['imported', 'done', 'error'])
+        ], limit=1)
+        if duplicate:
+            raise UserError(_("This file has already been imported in '%s'.") % duplicate.name)
+        self.file_checksum = checksum
 
-        # Read CSV file
-        csv_data = base64.b64decode(self.file)
-        csv_file = io.StringIO(csv_data.decode('utf-8'))
-        reader = csv.DictReader(csv_file)
-        _logger.info("CSV columns: %s", reader.fieldnames)
+    def _open_file_stream(self):
+        """Open a binary stream over the stored file without loading it at once"""
+        self.ensure_one()
+        attachment = self._get_file_attachment()
         
-        success_count = 0
-        error_lines = []
+        # Read the filestore directly when possible
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        if attachment.db_datas:
+            return io.BytesIO(attachment.db_datas)
+            
+        # Fallback: decode the base64 value chunk by chunk
+        return io.BufferedReader(Base64ChunkReader(self.with_context(bin_size=False).file))
 
-        # Delete old lines
-        self.line_ids.unlink()
+    @api.model
+    def _get_default_profile(self):
+        return self.env.ref('fingerprt_hr.import_profile_clock', raise_if_not_found=False)
 
-        # Import new lines
-        line_vals = []
-        for row in reader:
+    def _get_profile_spec(self):
+        """Return the format profile of the file, compiled once per import into a row converter"""
+        self.ensure_one()
+        return self.profile_id._get_spec() if self.profile_id else DEFAULT_PROFILE_SPEC
+
+    def _iter_file_rows(self):
+        """Stream the stored file and yield (line number, values, error) for each row.
+
+        Compressed files are kept compressed at rest and decompressed on the fly.
+        """
+        spec = self._get_profile_spec()
+        with self._open_file_stream() as stream:
             try:
-                # Extract data
-                employee_name = row.get('Display Name', '').strip()
-                date = row.get('Date', '').strip()
-                in_time = row.get('In Time', '').strip()
-                out_time = row.get('Out Time', '').strip()
+                yield from iter_clock_rows(open_decompressed_stream(stream, self.file_name), spec)
+            except ValueError as e:
+                raise UserError(str(e))
 
-                _logger.info("Processing line: name=%s, date=%s, in=%s, out=%s", 
-                           employee_name, date, in_time, out_time)
+    def _complete_line_vals(self, vals):
+        """Validate converted row values and add their fingerprint"""
+        # Validate required fields
+        if not vals['employee_name']:
+            raise ValidationError(_("Employee name is required."))
+        if not vals['date']:
+            raise ValidationError(_("Date is required."))
 
-                # Convert dates and times
-                check_in = self._convert_to_datetime(date, in_time) if date and in_time else False
-                check_out = self._convert_to_datetime(date, out_time) if date and out_time else False
+        return dict(vals, row_fingerprint=self._get_row_fingerprint(vals['employee_name'], vals['check_in']))
 
-                _logger.info("Conversion result: check_in=%s, check_out=%s", check_in, check_out)
+    def _get_row_fingerprint(self, employee_name, check_in):
+        """Return the fingerprint of a row of the import location.
 
-                # If no check-in, skip the line
-                if not check_in:
-                    _logger.info("Line ignored: no check-in")
-                    continue
+        The check-out is left out, so that a row exported again once checked
+        out is still known.
+        """
+        return hashlib.sha1('\x1f'.join([
+            employee_name,
+            fields.Datetime.to_string(check_in) or '',
+            str(self.location_id.id or '')
+        ]).encode('utf-8')).hexdigest()
 
-                # If check_out is before check_in, add a day
-                if check_in and check_out and check_out < check_in:
-                    check_out += timedelta(days=1)
-                    _logger.info("Adjustment check_out: %s", check_out)
+    def _get_line_common_vals(self):
+        """Return the values shared by all the lines of the import"""
+        return {
+            'import_id': self.id,
+            'location_id': self.location_id.id if self.location_id else False,
+            'state': 'imported'
+        }
 
-                # Validate required fields
-                if not employee_name:
-                    raise ValidationError(_("Employee name is required."))
-                if not date:
-                    raise ValidationError(_("Date is required."))
+    def _filter_known_rows(self, rows):
+        """Return the indexes of the buffered rows not ingested yet, by this file or a previous import.
 
-                # Prepare values
-                vals = {
-                    'import_id': self.id,
-                    'employee_name': employee_name,
-                    'display_id': row.get('Display ID', '').strip(),
-                    'payroll_id': row.get('Payroll ID', '').strip(),
-                    'department': row.get('Department', '').strip(),
-                    'dept_code': row.get('Dept. Code', '').strip(),
-                    'date': datetime.strptime(date, '%m/%d/%y').date() if date else False,
-                    'check_in': check_in,
-                    'check_out': check_out,
-                    'in_note': row.get('In Note', '').strip(),
-                    'out_note': row.get('Out Note', '').strip(),
-                    'reg_hours': float(row.get('REG', '0') or '0'),
-                    'ot1_hours': float(row.get('OT1', '0') or '0'),
-                    'ot2_hours': float(row.get('OT2', '0') or '0'),
-                    'total_hours': float(row.get('Total', '0') or '0'),
-                    'location_id': self.location_id.id if self.location_id else False,
-                    'state': 'imported'
-                }
-                
-                _logger.info("Values prepared: %s", vals)
+        The rows staged by the previous batches of the file are also known.
+        The known lines imported without check-out get the one of their row.
+        """
+        fingerprints = {rows.get_fingerprint(index) for index in range(len(rows))}
+        self.env['fingerprt_hr.import.line'].flush(['row_fingerprint', 'check_out'])
+        self.env.cr.execute("""
+            SELECT row_fingerprint, id, check_out IS NULL FROM fingerprt_hr_import_line
+            WHERE row_fingerprint IN %s
+        """, (tuple(fingerprints),))
+        known = set()
+        open_lines = {}
+        for fingerprint, line_id, without_check_out in self.env.cr.fetchall():
+            known.add(fingerprint)
+            if without_check_out:
+                open_lines[fingerprint] = line_id
+        # Rows of the previous batches of a staged file only become lines at the end
+        if self.load_method == 'staging':
+            known |= self.env['fingerprt_hr.import.staging']._get_staged_fingerprints(self, fingerprints)
+        
+        new_indexes = []
+        check_outs = {}
+        for index in range(len(rows)):
+            fingerprint = rows.get_fingerprint(index)
+            if fingerprint in known:
+                if fingerprint in open_lines and rows.get_check_out(index):
+                    check_outs[open_lines.pop(fingerprint)] = rows.get_check_out(index)
+                continue
+            known.add(fingerprint)
+            new_indexes.append(index)
+        self._complete_check_outs(check_outs)
+        return new_indexes
 
-                line_vals.append(vals)
-                success_count += 1
+    @api.model
+    def _complete_check_outs(self, check_outs):
+        """Set the check-out {line id: check-out} of lines imported before their row was checked out.
 
-            except Exception as e:
-                error_message = f"Error line {reader.line_num} ({employee_name if 'employee_name' in locals() else 'unknown'}): {str(e)}"
+        The attendances of the lines still open get the same check-out.
+        """
+        if not check_outs:
+            return
+        _logger.info("Completing the check-out of %d lines imported before", len(check_outs))
+        for line in self.env['fingerprt_hr.import.line'].browse(list(check_outs)):
+            check_out = check_outs[line.id]
+            line.check_out = check_out
+            if line.attendance_id and not line.attendance_id.check_out:
+                line.attendance_id.check_out = check_out
+
+    def _release_row_fingerprints(self):
+        """Let the rows of cancelled or failed imports be imported again"""
+        self.mapped('line_ids').filtered('row_fingerprint').write({'row_fingerprint': False})
+
+    def _restore_row_fingerprints(self):
+        """Fingerprint again the lines of a failed import being resumed.
+
+        The lines whose row was imported again by another import meanwhile are
+        dropped.
+        """
+        self.ensure_one()
+        lines = self.line_ids.filtered(lambda line: not line.row_fingerprint)
+        if not lines:
+            return
+        fingerprints = {line.id: self._get_row_fingerprint(line.employee_name, line.check_in) for line in lines}
+        self.env.cr.execute("""
+            SELECT row_fingerprint FROM fingerprt_hr_import_line
+            WHERE row_fingerprint IN %s
+        """, (tuple(set(fingerprints.values())),))
+        known = {row[0] for row in self.env.cr.fetchall()}
+        duplicates = lines.filtered(lambda line: fingerprints[line.id] in known)
+        restored_ids = (lines - duplicates).ids
+        self.env.cr.execute("""
+            UPDATE fingerprt_hr_import_line l
+            SET row_fingerprint = u.row_fingerprint
+            FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::varchar[]) AS row_fingerprint) u
+            WHERE l.id = u.id
+        """, (restored_ids, [fingerprints[line_id] for line_id in restored_ids]))
+        lines.invalidate_cache(['row_fingerprint'])
+        if duplicates:
+            _logger.info("Dropping %d lines imported again by another import", len(duplicates))
+            duplicates.unlink()
+
+    def _create_import_lines(self, rows):
+        """Create the lines of a batch of buffered rows and release them from the cache.
+
+        Return the number of created lines, rows already imported are skipped.
+        """
+        indexes = self._filter_known_rows(rows)
+        if not indexes:
+            return 0
+        _logger.info("Creating %d lines", len(indexes))
+        line_vals = rows.iter_vals(indexes, self._get_line_common_vals())
+        if self.load_method == 'copy':
+            return self.env['fingerprt_hr.import.line']._copy_create(line_vals)
+        if self.load_method == 'staging':
+            return self.env['fingerprt_hr.import.staging']._load(self, line_vals)
+            
+        lines = self.env['fingerprt_hr.import.line'].create(list(line_vals))
+        lines.flush()
+        lines.invalidate_cache(ids=lines.ids)
+        return len(lines)
+
+    def _commit_checkpoint(self, row_number, error_count=0):
+        """Persist the import cursor and commit the lines created so far"""
+        self.write({
+            'import_row_cursor': row_number,
+            'progress_parsed': row_number,
+            'progress_errors': error_count
+        })
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    def _import_csv_file(self, rows=None):
+        """Import CSV data by streaming the stored file in fixed-size batches.
+
+        A checkpoint is committed after each batch so that a failed import
+        resumes after the last committed row instead of starting over.
+        `rows` holds the rows of the file when they were already parsed by
+        a batch import, as a ClockRowBuffer.
+        """
+        self.ensure_one()
+        _logger.info("=== START IMPORT ===")
+
+        if not self.file:
+            raise UserError(_("Please select a file to import."))
+
+        error_lines = []
+        skipped_count = 0
+        older_count = 0
+        
+        # Delta imports only keep the rows from the last imported check-in on, the rows
+        # already imported at that time are then skipped by their fingerprint
+        watermark = self.import_mode == 'delta' and self.location_id.last_check_in
+        resume_row = self.import_row_cursor
+        row_number = 0
+        error_count = self.progress_errors if resume_row else 0
+
+        Staging = self.env['fingerprt_hr.import.staging']
+        if resume_row and self.load_method == 'staging' and not Staging._count(self):
+            # Staged rows do not survive a server crash, start over
+            _logger.info("Staged rows lost, restarting the import from the beginning")
+            resume_row = 0
+
+        if resume_row:
+            _logger.info("Resuming import after row %d", resume_row)
+            self._restore_row_fingerprints()
+        else:
+            self._check_duplicate_file()
+            
+            # Delete old lines
+            self.line_ids.unlink()
+            Staging._clear(self)
+            self.write({
+                'progress_parsed': 0,
+                'progress_mapped': 0,
+                'progress_created': 0,
+                'progress_errors': 0
+            })
+
+        # Read CSV file and import new lines, one batch at a time
+        if rows is None:
+            rows = self._iter_file_rows()
+        # Parsed rows wait for their batch in a compact columnar buffer
+        batch = ClockRowBuffer()
+        for line_num, vals, error_message in rows:
+            row_number += 1
+            if row_number <= resume_row:
+                continue
+                
+            if vals:
+                try:
+                    vals = self._complete_line_vals(vals)
+                except Exception as e:
+                    error_message = f"Error line {line_num} ({vals['employee_name'] or 'unknown'}): {str(e)}"
+            if error_message:
                 error_lines.append(error_message)
+                error_count += 1
                 _logger.error(error_message)
-
-        # Create lines
-        if line_vals:
-            _logger.info("Creating %d lines", len(line_vals))
-            self.env['fingerprt_hr.import.line'].create(line_vals)
+                continue
+                
+            if not vals:
+                continue
+            if watermark and vals['check_in'] < watermark:
+                older_count += 1
+                continue
+                
+            batch.append(line_num, vals)
             
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                skipped_count += len(batch) - self._create_import_lines(batch)
+                self._commit_checkpoint(row_number, error_count)
+                batch.clear()
+                
+        # Create remaining lines
+        if batch:
+            skipped_count += len(batch) - self._create_import_lines(batch)
+
+        if self.load_method == 'staging':
+            Staging._transfer(self)
+        if self.location_id:
+            self.location_id._update_last_check_in(self)
+
+        # The file is fully read, a new import starts from the beginning
+        self.write({
+            'import_row_cursor': 0,
+            'progress_parsed': row_number,
+            'progress_errors': error_count
+        })
+
+        # Statistics include the lines committed before a resume
+        self.env.cr.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT employee_name)
+            FROM fingerprt_hr_import_line
+            WHERE import_id = %s
+        """, (self.id,))
+        success_count, employee_count = self.env.cr.fetchone()
+
+        if success_count:
             # Confirmation message with statistics
             message = _("""Import successful on %s :
 - %d lines imported
 - %d employees different""") % (
                 fields.Datetime.now().strftime('%d/%m/%Y à %H:%M:%S'),
                 success_count,
-                len(set(val['employee_name'] for val in line_vals))
+                employee_count
             )
             
+            if skipped_count:
+                message += _("\n- %d rows already imported skipped") % skipped_count
+            if older_count:
+                message += _("\n- %d rows older than the last import of the location skipped") % older_count
             if error_lines:
                 message += _("\n\nErrors :\n%s") % '\n'.join(error_lines)
                 
@@ -396,6 +754,77 @@ class FingerprtHrImport(models.Model):
         else:
             raise UserError(_("No valid line found in the file."))
 
+    def _preview_file(self, row_limit=0, sample_rate=1.0):
+        """Read the file without writing anything and return statistics on its content.
+
+        Only the first `row_limit` analysed rows are read if set, and only a
+        regularly spaced `sample_rate` fraction of the rows is analysed.
+        """
+        self.ensure_one()
+        if not self.file:
+            raise UserError(_("Please select a file to import."))
+        if not 0 < sample_rate <= 1:
+            raise UserError(_("The sampled fraction must be greater than 0 and at most 1."))
+
+        name_counts = defaultdict(int)
+        errors = []
+        stats = {
+            'rows_read': 0,
+            'rows_valid': 0,
+            'rows_ignored': 0,
+            'error_count': 0,
+            'date_from': False,
+            'date_to': False,
+        }
+        
+        for row_number, (line_num, vals, error_message) in enumerate(self._iter_file_rows(), 1):
+            if row_limit and stats['rows_read'] >= row_limit:
+                break
+            # Systematic sampling keeps every n-th row
+            if int(row_number * sample_rate) == int((row_number - 1) * sample_rate):
+                continue
+            stats['rows_read'] += 1
+            
+            if vals:
+                try:
+                    vals = self._complete_line_vals(vals)
+                except Exception as e:
+                    error_message = _("Line %d : %s") % (line_num, str(e))
+            if error_message:
+                stats['error_count'] += 1
+                if len(errors) < PREVIEW_MAX_ERRORS:
+                    errors.append(error_message)
+                continue
+                
+            if not vals:
+                stats['rows_ignored'] += 1
+                continue
+                
+            stats['rows_valid'] += 1
+            name_counts[vals['employee_name']] += 1
+            if not stats['date_from'] or vals['date'] < stats['date_from']:
+                stats['date_from'] = vals['date']
+            if not stats['date_to'] or vals['date'] > stats['date_to']:
+                stats['date_to'] = vals['date']
+
+        # Resolve all distinct names with one query
+        mapped_names = set()
+        if name_counts:
+            mapped_names = set(self.env['fingerprt_hr.employee.mapping'].search([
+                ('name', 'in', list(name_counts)),
+                ('active', '=', True)
+            ]).mapped('name'))
+        mapped_rows = sum(name_counts[name] for name in mapped_names)
+        
+        stats.update({
+            'distinct_names': len(name_counts),
+            'mapped_names': len(mapped_names),
+            'mapped_rows': mapped_rows,
+            'mapping_hit_rate': (mapped_rows / stats['rows_valid'] * 100) if stats['rows_valid'] else 0.0,
+            'error_details': '\n'.join(errors),
+        })
+        return stats
+
     def action_create_attendances(self):
         """Create attendances from imported lines"""
         self.ensure_one()
@@ -404,20 +833,7 @@ class FingerprtHrImport(models.Model):
             raise UserError(_("You can only create attendances if the import is in the 'Imported' state."))
             
         # Search for matches for lines without employee
-        unmapped_lines = self.line_ids.filtered(lambda l: not l.employee_id and l.state != 'done')
-        _logger.info("Number of lines without match: %d", len(unmapped_lines))
-        mapped_count = 0
-        
-        for line in unmapped_lines:
-            # Search for an employee by name
-            if line.employee_name:
-                employee = self._find_employee_by_name(line.employee_name)
-                if employee:
-                    line.write({
-                        'employee_id': employee.id,
-                        'state': 'mapped'
-                    })
-                    mapped_count += 1
+        mapped_count = self._map_unmapped_lines()
                     
         # If there are still lines without match, open the selection assistant
         remaining_unmapped = self.line_ids.filtered(lambda l: not l.employee_id and l.state != 'done')
@@ -455,11 +871,168 @@ class FingerprtHrImport(models.Model):
             )
         return self._create_attendances(mapped_count)
 
+    def _resolve_employee_names(self, line_counts, usage, fuzzy=True):
+        """Resolve each distinct imported name once.
+
+        `line_counts` gives the number of lines of each name. Existing
+        mappings are read with a single query, the other names are searched
+        among the employees if `fuzzy` is set, in one batch scored on all
+        cores when they are many. The uses of the mappings are
+        added to the `usage` counter. Return a dict giving the employee of
+        each resolved name.
+        """
+        names = {name for name in line_counts if name}
+        if not names:
+            return {}
+        mappings = self.env['fingerprt_hr.employee.mapping'].search([
+            ('name', 'in', list(names)),
+            ('active', '=', True)
+        ])
+        employees = {}
+        for mapping in mappings:
+            employees[mapping.name] = mapping.employee_id
+            usage[mapping.id] += line_counts[mapping.name]
+        unresolved = names - set(employees)
+        if fuzzy and len(unresolved) >= PARALLEL_MATCH_MIN_NAMES:
+            employees.update(self._match_employee_names(
+                {name: line_counts[name] for name in unresolved}, usage))
+        elif fuzzy:
+            for name in unresolved:
+                employee = self._match_employee_name(name, usage, line_counts[name])
+                if employee:
+                    employees[name] = employee
+        return employees
+
+    @api.model
+    def _get_employee_id_index(self):
+        """Return the active employee of each badge ID and barcode, read with one query.
+
+        Identifiers shared by several employees are left out.
+        """
+        index = {}
+        ambiguous = set()
+        for employee in self.env['hr.employee'].search_read([
+            '|', ('badge_id', '!=', False), ('barcode', '!=', False)
+        ], ['badge_id', 'barcode']):
+            for key in {(employee['badge_id'] or '').strip(), (employee['barcode'] or '').strip()}:
+                if not key:
+                    continue
+                if index.setdefault(key, employee['id']) != employee['id']:
+                    ambiguous.add(key)
+        for key in ambiguous:
+            del index[key]
+        return index
+
+    @api.model
+    def _map_lines_by_ids(self, lines):
+        """Assign an employee to the lines whose display or payroll ID is a badge ID or a barcode.
+
+        Return the lines left without match and the number of mapped lines.
+        """
+        index = self._get_employee_id_index()
+        if not index:
+            return lines, 0
+        line_ids_by_employee = defaultdict(list)
+        remaining_ids = []
+        for line in lines:
+            employee_id = index.get((line.display_id or '').strip()) or index.get((line.payroll_id or '').strip())
+            if employee_id:
+                line_ids_by_employee[employee_id].append(line.id)
+            else:
+                remaining_ids.append(line.id)
+
+        # Identifiers are not names, no mapping is recorded for them
+        Line = self.env['fingerprt_hr.import.line'].with_context(skip_mapping_update=True)
+        for employee_id, line_ids in line_ids_by_employee.items():
+            Line.browse(line_ids).write({
+                'employee_id': employee_id,
+                'state': 'mapped'
+            })
+        mapped_count = len(lines) - len(remaining_ids)
+        _logger.info("%d lines matched by badge or payroll ID", mapped_count)
+        return lines.browse(remaining_ids), mapped_count
+
+    def _map_lines(self, lines, fuzzy=True):
+        """Assign an employee to lines without match. Return the number of mapped lines.
+
+        Lines are first matched by badge or payroll ID, then grouped by name.
+        The mapping usage counters and imports are updated once for all the lines.
+        """
+        line_ids = lines.ids
+        lines, id_mapped_count = self._map_lines_by_ids(lines)
+        line_ids_by_name = defaultdict(list)
+        for line in lines:
+            if line.employee_name:
+                line_ids_by_name[line.employee_name].append(line.id)
+        usage = Counter()
+        employees = self._resolve_employee_names(
+            {name: len(line_ids) for name, line_ids in line_ids_by_name.items()}, usage, fuzzy)
+
+        # One write per employee, the mappings are already up to date
+        line_ids_by_employee = defaultdict(list)
+        for name, employee in employees.items():
+            line_ids_by_employee[employee.id].extend(line_ids_by_name[name])
+        Line = self.env['fingerprt_hr.import.line'].with_context(skip_mapping_update=True)
+        for employee_id, line_ids in line_ids_by_employee.items():
+            Line.browse(line_ids).write({
+                'employee_id': employee_id,
+                'state': 'mapped'
+            })
+        self.env['fingerprt_hr.employee.mapping']._add_usage(usage)
+        self.env['fingerprt_hr.employee.mapping']._link_imports(line_ids=line_ids)
+        return id_mapped_count + sum(len(line_ids) for line_ids in line_ids_by_employee.values())
+
+    def _map_unmapped_lines(self):
+        """Search an employee for each line without match, return the number of mapped lines"""
+        self.ensure_one()
+        unmapped_lines = self.line_ids.filtered(lambda l: not l.employee_id and l.state != 'done')
+        _logger.info("Number of lines without match: %d", len(unmapped_lines))
+        mapped_count = self._map_lines(unmapped_lines)
+        self.progress_mapped = len(self.line_ids.filtered(lambda l: l.employee_id))
+        return mapped_count
+
     def _create_attendances(self, mapped_count=0):
         """Create attendances for lines with an employee"""
         self.ensure_one()
         
-        # Create attendances for lines with an employee
+        # Set-based creation for the staging pipeline, falling back to the ORM on failure
+        counts = None
+        if self.load_method == 'staging':
+            counts = self.env['fingerprt_hr.import.staging']._create_attendances(self)
+        if counts is None:
+            counts = self._create_line_attendances()
+        attendance_count, duplicate_count, error_count = counts
+                
+        # Update import state if at least one attendance was created
+        if attendance_count > 0 or duplicate_count > 0:
+            self.write({'state': 'done'})
+            
+        self.write({
+            'progress_created': self.progress_created + attendance_count,
+            'progress_errors': self.progress_errors + error_count
+        })
+            
+        # Confirmation message
+        unmapped_count = len(self.line_ids.filtered(lambda l: not l.employee_id))
+        error_count = len(self.line_ids.filtered(lambda l: l.state == 'error'))
+        
+        message = _("""
+Creation of attendances completed :
+- %d attendances created
+- %d duplicates detected and associated
+- %d lines without match
+- %d lines in error
+""") % (attendance_count, duplicate_count, unmapped_count, error_count)
+
+        self.message_post(body=message)
+        
+        return True
+
+    def _create_line_attendances(self):
+        """Create attendances line by line through the ORM.
+
+        Return the number of created attendances, duplicates and errors.
+        """
         attendance_count = 0
         error_count = 0
         duplicate_count = 0
@@ -518,25 +1091,7 @@ class FingerprtHrImport(models.Model):
                 })
                 error_count += 1
                 
-        # Update import state if at least one attendance was created
-        if attendance_count > 0 or duplicate_count > 0:
-            self.write({'state': 'done'})
-            
-        # Confirmation message
-        unmapped_count = len(self.line_ids.filtered(lambda l: not l.employee_id))
-        error_count = len(self.line_ids.filtered(lambda l: l.state == 'error'))
-        
-        message = _("""
-Creation of attendances completed :
-- %d attendances created
-- %d duplicates detected and associated
-- %d lines without match
-- %d lines in error
-""") % (attendance_count, duplicate_count, unmapped_count, error_count)
-
-        self.message_post(body=message)
-        
-        return True
+        return attendance_count, duplicate_count, error_count
 
     def action_view_attendances(self):
         """View created attendances"""
@@ -572,29 +1127,12 @@ Creation of attendances completed :
                 }
             }
             
-        # Search for existing mappings
-        for line in unmapped_lines:
-            _logger.info("Searching for matching employee: %s", line.employee_name)
-            mapping = self.env['fingerprt_hr.employee.mapping'].search([
-                ('name', '=', line.employee_name),
-                ('active', '=', True)
-            ], limit=1)
-            
-            if mapping:
-                try:
-                    _logger.info("Matching found: %s -> %s",
-                               mapping.name, mapping.employee_id.name)
-                    line.write({
-                        'employee_id': mapping.employee_id.id,
-                        'state': 'mapped'
-                    })
-                    # Update usage counter
-                    mapping.write({
-                        'import_count': mapping.import_count + 1,
-                        'last_used': fields.Datetime.now()
-                    })
-                except Exception as e:
-                    _logger.error("Error updating line: %s", str(e))
+        # Search for existing mappings, once per distinct name
+        try:
+            mapped_count = self._map_lines(unmapped_lines, fuzzy=False)
+            _logger.info("Matching found for %d lines", mapped_count)
+        except Exception as e:
+            _logger.error("Error updating lines: %s", str(e))
                     
         # Count remaining lines without match
         remaining = len(self.line_ids.filtered(lambda l: not l.employee_id and l.state != 'done'))
@@ -676,7 +1214,10 @@ Creation of attendances completed :
         for record in self:
             if record.state == 'done':
                 raise UserError(_("Impossible d'annuler un import terminé."))
+            # Rows of a cancelled import can be imported again
+            record._release_row_fingerprints()
             record.write({'state': 'cancelled'})
+            record.location_id._update_last_check_in()
             
     def action_reset(self):
         """Reset the import"""
@@ -724,6 +1265,21 @@ Creation of attendances completed :
         if self.state != 'draft':
             raise UserError(_("You can only import if the state is 'Draft'."))
             
+        return self._run_import()
+
+    def action_resume_import(self):
+        """Resume a failed or interrupted import from its last committed row"""
+        self.ensure_one()
+        if self.state not in ['imported', 'error'] or not self.import_row_cursor:
+            raise UserError(_("Only a failed or interrupted import with committed lines can be resumed."))
+            
+        return self._run_import()
+
+    def _run_import(self, rows=None):
+        """Read the file and mark the import as failed on error.
+
+        `rows` holds the rows already parsed by a batch import, if any.
+        """
         # Update state
         self.write({
             'state': 'imported',
@@ -732,46 +1288,133 @@ Creation of attendances completed :
             
         # Import the file
         try:
-            self._import_csv_file()
+            self._import_csv_file(rows)
             # Generate initial mapping report
             self._generate_mapping_report()
             return True
         except Exception as e:
+            if not self.env.registry.in_test_mode():
+                # Keep the committed checkpoint, drop the current batch only
+                self.env.cr.rollback()
+                self.env.clear()
             self.state = 'error'
+            # Rows of a failed import can be imported again, until it is resumed
+            self._release_row_fingerprints()
             self.message_post(body=_("Erreur lors de l'import : %s") % str(e))
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
             raise UserError(_("Erreur lors de l'import : %s") % str(e))
 
+    def action_enqueue_import(self):
+        """Import the file and create attendances in background jobs"""
+        self.ensure_one()
+        if not self.file:
+            raise UserError(_("Please select a file to import."))
+        if self.job_running:
+            raise UserError(_("A background job is already running for this import."))
+        if self.state != 'draft' and not (self.state in ['imported', 'error'] and self.import_row_cursor):
+            raise UserError(_("You can only import if the state is 'Draft'."))
+            
+        self.env['fingerprt_hr.import.job']._enqueue(self, 'parse')
+        return self._job_enqueued_notification()
+
+    def action_enqueue_attendances(self):
+        """Map employees and create attendances in background jobs"""
+        self.ensure_one()
+        if self.state not in ['imported']:
+            raise UserError(_("You can only create attendances if the import is in the 'Imported' state."))
+        if self.job_running:
+            raise UserError(_("A background job is already running for this import."))
+            
+        self.env['fingerprt_hr.import.job']._enqueue(self, 'map')
+        return self._job_enqueued_notification()
+
+    def _job_enqueued_notification(self):
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'message': _("The import has been queued, its progress is updated on the form."),
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'reload'}
+            }
+        }
+
+    def _job_parse(self):
+        """Background stage: read the file into import lines"""
+        self.ensure_one()
+        self.write({
+            'state': 'imported',
+            'import_date': fields.Datetime.now()
+        })
+        self._import_csv_file()
+        self._generate_mapping_report()
+        return True
+
+    def _job_map(self):
+        """Background stage: search employees, return False if lines remain without match"""
+        self.ensure_one()
+        if self.state != 'imported':
+            return False
+            
+        mapped_count = self._map_unmapped_lines()
+        remaining = len(self.line_ids.filtered(lambda l: not l.employee_id and l.state != 'done'))
+        
+        message = _("Automatic search for matches :\n- %d lines have been mapped") % mapped_count
+        if remaining:
+            message += _("\n- %d lines remain without match, use 'Create Attendances' "
+                         "to select the employees.") % remaining
+        self.message_post(
+            body=message,
+            message_type='notification',
+            subtype_id=self.env.ref('mail.mt_note').id
+        )
+        return not remaining
+
+    def _job_create(self):
+        """Background stage: create attendances for the mapped lines"""
+        self.ensure_one()
+        if self.state != 'imported':
+            return False
+        self._create_attendances(self.progress_mapped)
+        return True
+
     def _name_similarity_score(self, name1, name2):
         """Calculate similarity score between two names"""
         if not name1 or not name2:
             return 0.0
             
         # Normalize the names
-        normalized_name1 = self._normalize_name(name1)
-        normalized_name2 = self._normalize_name(name2)
+        normalized_name1 = normalize_name(name1)
+        normalized_name2 = normalize_name(name2)
         
-        if not normalized_name1 or not normalized_name2:
-            return 0.0
-            
         # If the name is too short or could be just a first name/last name, return 0
-        if len(normalized_name1.split()) == 1 and len(normalized_name1) < 5:
-            return 0.0
-            
-        if len(normalized_name2.split()) == 1 and len(normalized_name2) < 5:
+        if is_name_too_short(normalized_name1) or is_name_too_short(normalized_name2):
             return 0.0
             
-        # Calculate similarity
-        similarity = difflib.SequenceMatcher(None, normalized_name1, normalized_name2).ratio()
-        
-        # Check if one name is contained in the other
-        contains_score = 0.0
-        if normalized_name1 in normalized_name2:
-            contains_score = len(normalized_name1) / len(normalized_name2)
-        elif normalized_name2 in normalized_name1:
-            contains_score = len(normalized_name2) / len(normalized_name1)
-            
-        # Return the best score
-        return max(similarity, contains_score)
+        return similarity_score(normalized_name1, normalized_name2)
+
+    @api.model
+    def _suggest_employees(self, names, limit=3, min_score=0.3, max_names=None, exclude_employee_ids=()):
+        """Return the best scored active employees of each name as [(employee, score)], best first.
+
+        Names too short to be compared or without candidate above `min_score`
+        are left out. The names are scored in order, until `max_names` of them
+        have suggestions if set. The employees of `exclude_employee_ids` are
+        never suggested.
+        """
+        name_index = self.env['hr.employee']._get_name_index()
+        Employee = self.env['hr.employee']
+        exclude = set(exclude_employee_ids)
+        suggestions = {}
+        for name in dict.fromkeys(names):
+            if max_names is not None and len(suggestions) >= max_names:
+                break
+            matches = name_index.top_matches(normalize_name(name), limit, min_score, exclude=exclude)
+            if matches:
+                suggestions[name] = [(Employee.browse(entry[0]), score) for entry, score in matches]
+        return suggestions
 
     def _generate_mapping_report(self):
         """Generate a report on the mappings"""
@@ -780,34 +1423,15 @@ Creation of attendances completed :
         mapped_lines = len(self.line_ids.filtered(lambda l: l.employee_id))
         unmapped_lines = total_lines - mapped_lines
         
-        # Retrieve names without match
-        unmapped_names = self.line_ids.filtered(lambda l: not l.employee_id).mapped('employee_name')
+        # Retrieve names without match, the most frequent first
+        name_counts = Counter(name for name in self.line_ids.filtered(
+            lambda l: not l.employee_id).mapped('employee_name') if name)
+        unmapped_names = [name for name, count in name_counts.most_common()]
         
-        # Find similar names to suggest mappings
-        suggestions = []
-        for name in unmapped_names[:10]:  # Limit to 10 names to avoid a long report
-            if not name:  # Ignore empty names
-                continue
-                
-            # Check if the name is too short for suggestions
-            normalized_name = self._normalize_name(name)
-            if not normalized_name or (len(normalized_name.split()) == 1 and len(normalized_name) < 5):
-                continue
-                
-            employees = self.env['hr.employee'].search([('active', '=', True)], limit=10)
-            matches = []
-            
-            for employee in employees:
-                if not employee.name:  # Ignore employees without name
-                    continue
-                    
-                score = self._name_similarity_score(name, employee.name)
-                if score >= 0.3:  # Low threshold for suggestions
-                    matches.append((employee, score))
-            
-            matches.sort(key=lambda x: x[1], reverse=True)
-            if matches:
-                suggestions.append((name, matches[:3]))  # Keep the 3 best suggestions
+        # Suggest the best employees of the company, only for the most frequent
+        # names to avoid a long report
+        suggestions_by_name = self._suggest_employees(unmapped_names, max_names=REPORT_MAX_SUGGESTIONS)
+        suggestions = [(name, suggestions_by_name[name]) for name in unmapped_names if name in suggestions_by_name]
         
         # Generate the report
         report = _("""
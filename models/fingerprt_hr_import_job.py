@@ -0,0 +1,129 @@
+from odoo import api, fields, models, _
+from datetime import timedelta
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Stages run in this order for a complete import
+JOB_STAGES = ['parse', 'map', 'create']
+
+# A running job not finished after this delay is considered as interrupted
+STALE_JOB_DELAY = timedelta(hours=2)
+
+
+class FingerprtHrImportJob(models.Model):
+    _name = 'fingerprt_hr.import.job'
+    _description = 'Import Background Job'
+    _order = 'id'
+
+    import_id = fields.Many2one('fingerprt_hr.import', string='Import', required=True, ondelete='cascade', index=True)
+    stage = fields.Selection([
+        ('parse', 'Parse File'),
+        ('map', 'Map Employees'),
+        ('create', 'Create Attendances')
+    ], string='Stage', required=True)
+    chain = fields.Boolean(string='Run Next Stages', default=True,
+                           help="Enqueue the next stage once this one is done")
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], string='State', default='pending', required=True, index=True)
+    date_started = fields.Datetime(string='Started On', readonly=True)
+    date_done = fields.Datetime(string='Finished On', readonly=True)
+    attempt_count = fields.Integer(string='Attempts', readonly=True)
+    error_message = fields.Text(string='Error Message', readonly=True)
+
+    @api.model
+    def _enqueue(self, import_record, stage, chain=True):
+        """Create a pending job and wake up the cron"""
+        job = self.create({
+            'import_id': import_record.id,
+            'stage': stage,
+            'chain': chain
+        })
+        cron = self.env.ref('fingerprt_hr.ir_cron_process_import_jobs', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return job
+
+    @api.model
+    def _claim_next_job(self):
+        """Lock and return the next job to run, or an empty recordset"""
+        stale_date = fields.Datetime.now() - STALE_JOB_DELAY
+        self.env.cr.execute("""
+            SELECT id FROM fingerprt_hr_import_job
+            WHERE state = 'pending'
+               OR (state = 'running' AND date_started < %s)
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        """, (stale_date,))
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.browse(row[0])
+        job.write({
+            'state': 'running',
+            'date_started': fields.Datetime.now(),
+            'attempt_count': job.attempt_count + 1,
+            'error_message': False
+        })
+        return job
+
+    @api.model
+    def _cron_process_jobs(self, time_limit=600):
+        """Run pending jobs one by one, committing after each of them"""
+        start = time.time()
+        auto_commit = not self.env.registry.in_test_mode()
+
+        while time.time() - start < time_limit:
+            job = self._claim_next_job()
+            if not job:
+                break
+            if auto_commit:
+                self.env.cr.commit()
+
+            _logger.info("Running import job %s (%s) for import %s", job.id, job.stage, job.import_id.id)
+            try:
+                job._run()
+            except Exception as e:
+                _logger.exception("Import job %s failed", job.id)
+                if auto_commit:
+                    self.env.cr.rollback()
+                    self.env.clear()
+                job._mark_failed(str(e))
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _run(self):
+        """Run the stage of the job and enqueue the next one"""
+        self.ensure_one()
+        import_record = self.import_id
+        proceed = getattr(import_record, '_job_%s' % self.stage)()
+        self.write({
+            'state': 'done',
+            'date_done': fields.Datetime.now()
+        })
+
+        next_index = JOB_STAGES.index(self.stage) + 1
+        if self.chain and proceed and next_index < len(JOB_STAGES):
+            self._enqueue(import_record, JOB_STAGES[next_index])
+
+    def _mark_failed(self, error_message):
+        """Record the failure on the job and its import"""
+        self.ensure_one()
+        self.write({
+            'state': 'failed',
+            'date_done': fields.Datetime.now(),
+            'error_message': error_message
+        })
+        if self.stage == 'parse':
+            self.import_id.state = 'error'
+            self.import_id._release_row_fingerprints()
+        self.import_id.message_post(
+            body=_("Background job '%s' failed : %s") % (
+                dict(self._fields['stage'].selection).get(self.stage), error_message)
+        )
@@ -1,16 +1,26 @@
 from odoo import api, fields, models, _
 from datetime import datetime, timedelta
 from odoo.exceptions import ValidationError, UserError
+import csv
+import io
 import logging
+from collections import Counter, defaultdict
 
 _logger = logging.getLogger(__name__)
 
+# Stored columns written by the COPY fast path, besides the state and log columns
+COPY_COLUMNS = [
+    'import_id', 'employee_name', 'employee_id', 'display_id', 'payroll_id',
+    'department', 'dept_code', 'date', 'check_in', 'check_out', 'in_note',
+    'out_note', 'reg_hours', 'ot1_hours', 'ot2_hours', 'location_id', 'row_fingerprint',
+]
+
 class FingerprtHrImportLine(models.Model):
     _name = 'fingerprt_hr.import.line'
     _description = 'Import Line'
     _order = 'date, employee_name'
 
-    import_id = fields.Many2one('fingerprt_hr.import', string='Import', required=True, ondelete='cascade')
+    import_id = fields.Many2one('fingerprt_hr.import', string='Import', required=True, ondelete='cascade', index=True)
     employee_name = fields.Char(string='Imported Name', required=True)
     employee_id = fields.Many2one('hr.employee', string='Employee')
     display_id = fields.Char(string='Badge ID')
@@ -30,6 +40,8 @@ class FingerprtHrImportLine(models.Model):
     attendance_id = fields.Many2one('hr.attendance', string='Attendance')
     error_message = fields.Text(string='Error Message')
     notes = fields.Text(string='Notes')
+    row_fingerprint = fields.Char(string='Row Fingerprint', readonly=True, copy=False,
+                                 help="Hash of the name, check-in and location of the imported row")
 
     state = fields.Selection([
         ('imported', 'Imported'),
@@ -38,19 +50,75 @@ class FingerprtHrImportLine(models.Model):
         ('error', 'Error')
     ], string='State', default='imported', required=True)
 
-    @api.model
-    def create(self, vals):
+    _sql_constraints = [
+        ('unique_row_fingerprint', 'unique(row_fingerprint)',
+         'This row has already been imported!')
+    ]
+
+    def init(self):
+        # Latest check-in of a location, recomputed when an import is cancelled
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS fingerprt_hr_import_line_location_check_in_idx
+            ON fingerprt_hr_import_line (location_id, check_in)
+        """)
+
+    @api.model_create_multi
+    def create(self, vals_list):
         """Override creation to initialize state"""
-        _logger.info("=== START CREATE IMPORT LINE ===")
-        _logger.info("Received values: %s", vals)
-        
-        if vals.get('employee_id'):
-            vals['state'] = 'mapped'
-        else:
-            vals['state'] = 'imported'
+        for vals in vals_list:
+            vals['state'] = 'mapped' if vals.get('employee_id') else 'imported'
+        lines = super().create(vals_list)
+        mapped_lines = lines.filtered('employee_id')
+        if mapped_lines:
+            self.env['fingerprt_hr.employee.mapping']._link_imports(line_ids=mapped_lines.ids)
+        return lines
+
+    @api.model
+    def _copy_create(self, vals_list):
+        """Insert trusted lines with a PostgreSQL COPY, bypassing the ORM create.
+
+        Only the check-in/check-out constraint and the state initialization
+        are applied, return the number of inserted lines. `vals_list` may
+        be any iterable, it is only read once.
+        """
+        now = fields.Datetime.to_string(fields.Datetime.now())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        mapped_import_ids = set()
+        for vals in vals_list:
+            count += 1
+            if vals.get('employee_id'):
+                mapped_import_ids.add(vals.get('import_id'))
+            check_in = vals.get('check_in')
+            check_out = vals.get('check_out')
+            if check_in and check_out and check_out < check_in:
+                raise ValidationError(_('Check-out time cannot be earlier than check-in time.'))
+                
+            # Empty values are written unquoted, which COPY reads as NULL
+            row = [vals.get(column) for column in COPY_COLUMNS]
+            row = ['' if value is None or value is False else value for value in row]
+            row += ['mapped' if vals.get('employee_id') else 'imported', self.env.uid, now, self.env.uid, now]
+            writer.writerow(row)
+        if not count:
+            return 0
             
-        _logger.info("=== END CREATE IMPORT LINE ===")
-        return super().create(vals)
+        buffer.seek(0)
+        self.flush()
+        self.env.cr.copy_expert(
+            "COPY %s (%s) FROM STDIN WITH (FORMAT csv)" % (
+                self._table,
+                ', '.join(COPY_COLUMNS + ['state', 'create_uid', 'create_date', 'write_uid', 'write_date'])
+            ),
+            buffer
+        )
+        
+        # The ORM did not see these rows, drop what it may have cached
+        self.invalidate_cache()
+        self.env['fingerprt_hr.import'].invalidate_cache(['line_ids'])
+        if mapped_import_ids:
+            self.env['fingerprt_hr.employee.mapping']._link_imports(import_ids=list(mapped_import_ids))
+        return count
 
     @api.depends('check_in', 'check_out')
     def _compute_hours(self):
@@ -83,60 +151,84 @@ class FingerprtHrImportLine(models.Model):
                         "Cannot mark as done a line without an associated employee"
                     ))
                     
+        # Lines leaving their mapping, they are linked again below if they get another one
+        relinked = self.browse()
+        if 'employee_id' in vals or 'employee_name' in vals:
+            relinked = self.filtered('employee_id')
+            self.env['fingerprt_hr.employee.mapping']._unlink_imports(relinked.ids)
+
         result = super().write(vals)
         
-        # After update, create/update mappings if necessary
-        if vals.get('employee_id'):
+        # After update, create/update mappings if necessary, once per distinct name
+        if vals.get('employee_id') and not self.env.context.get('skip_mapping_update'):
+            employee = self.env['hr.employee'].browse(vals['employee_id'])
+            usage = Counter()
+            records_by_name = defaultdict(list)
             for record in self:
                 if record.employee_name:  # Check that name is not empty
-                    employee = self.env['hr.employee'].browse(vals['employee_id'])
-                    _logger.info("Searching for mapping for %s -> %s", 
-                               record.employee_name, employee.name)
-                    
-                    # Search for an existing mapping (active or inactive)
-                    mapping = self.env['fingerprt_hr.employee.mapping'].search(
-                        [('name', '=', record.employee_name),
-                        ('employee_id', '=', vals['employee_id']),
-                        '|',
-                        ('active', '=', True),
-                        ('active', '=', False)
-                        ], limit=1)
+                    records_by_name[record.employee_name].append(record)
                     
-                    # Check if employee already has an active mapping with another name
-                    existing_employee_mapping = self.env['fingerprt_hr.employee.mapping'].search([
-                        ('employee_id', '=', vals['employee_id']),
-                        '|',
-                        ('active', '=', True),
-                        ('active', '=', False)
+            for employee_name, records in records_by_name.items():
+                record = records[0]
+                _logger.info("Searching for mapping for %s -> %s", 
+                           employee_name, employee.name)
+                
+                # Search for an existing mapping (active or inactive)
+                mapping = self.env['fingerprt_hr.employee.mapping'].search(
+                    [('name', '=', employee_name),
+                    ('employee_id', '=', vals['employee_id']),
+                    '|',
+                    ('active', '=', True),
+                    ('active', '=', False)
                     ], limit=1)
-                    
-                    if not mapping:
-                        try:
-                            # If employee already has an active mapping with another name, do not create a new mapping
-                            if existing_employee_mapping and existing_employee_mapping.name != record.employee_name:
-                                pass
-                            else:
-                                # Create a new mapping
-                                mapping_vals = {
-                                    'name': record.employee_name,
-                                    'employee_id': vals['employee_id'],
-                                    'import_id': record.import_id.id,
-                                }
-                                self.env['fingerprt_hr.employee.mapping'].sudo().create(mapping_vals)
-                        except Exception as e:
-                            _logger.error("Error creating mapping: %s", str(e))
-                            # Do not block the update of the line
-                    else:
-                        # Reactivate and update the usage counter
+                
+                # Check if employee already has an active mapping with another name
+                existing_employee_mapping = self.env['fingerprt_hr.employee.mapping'].search([
+                    ('employee_id', '=', vals['employee_id']),
+                    '|',
+                    ('active', '=', True),
+                    ('active', '=', False)
+                ], limit=1)
+                
+                if not mapping:
+                    try:
+                        # If employee already has an active mapping with another name, do not create a new mapping
+                        if existing_employee_mapping and existing_employee_mapping.name != employee_name:
+                            pass
+                        else:
+                            # Create a new mapping
+                            mapping_vals = {
+                                'name': employee_name,
+                                'employee_id': vals['employee_id'],
+                                'import_id': record.import_id.id,
+                            }
+                            self.env['fingerprt_hr.employee.mapping'].sudo().create(mapping_vals)
+                    except Exception as e:
+                        _logger.error("Error creating mapping: %s", str(e))
+                        # Do not block the update of the line
+                else:
+                    # Reactivate, the usage counter is updated below
+                    if not mapping.active or mapping.import_id != records[-1].import_id:
                         mapping.write({
                             'active': True,
-                            'import_count': mapping.import_count + 1,
-                            'last_used': fields.Datetime.now(),
-                            'import_id': record.import_id.id
+                            'import_id': records[-1].import_id.id
                         })
+                    usage[mapping.id] += len(records)
+            self.env['fingerprt_hr.employee.mapping']._add_usage(usage)
+
+        # Record the imports of the mappings used by the lines, the grouped
+        # mapping passes link all their lines at once
+        if not self.env.context.get('skip_mapping_update'):
+            relinked = self
+        if relinked and (vals.get('employee_id') or 'employee_name' in vals):
+            self.env['fingerprt_hr.employee.mapping']._link_imports(line_ids=relinked.ids)
         
         return result
 
+    def unlink(self):
+        self.env['fingerprt_hr.employee.mapping']._unlink_imports(self.filtered('employee_id').ids)
+        return super().unlink()
+
     def action_view_attendance(self):
         """View associated attendance"""
         self.ensure_one()
@@ -159,86 +251,71 @@ class FingerprtHrImportLine(models.Model):
                 raise ValidationError(_('Check-out time cannot be earlier than check-in time.'))
 
     def find_employee_mapping(self):
-        """Automatically search for employee mappings"""
-        mapped_count = 0
+        """Automatically search for employee mappings, once per distinct name"""
         error_count = 0
+        Import = self.env['fingerprt_hr.import']
         
-        for record in self:
-            if not record.employee_id and record.employee_name:
-                try:
-                    # First, search for an existing mapping
-                    mapping = self.env['fingerprt_hr.employee.mapping'].search([
-                        ('name', '=', record.employee_name),
+        # Badge and payroll IDs first, then the names
+        unmapped, mapped_count = Import._map_lines_by_ids(self.filtered(lambda l: not l.employee_id))
+        line_ids_by_name = defaultdict(list)
+        for record in unmapped:
+            if record.employee_name:
+                line_ids_by_name[record.employee_name].append(record.id)
+                
+        # Existing mappings of all the names, in one query, usage counters updated once at the end
+        usage = Counter()
+        employees = Import._resolve_employee_names(
+            {name: len(line_ids) for name, line_ids in line_ids_by_name.items()}, usage, fuzzy=False)
+        Line = self.with_context(skip_mapping_update=True)
+        
+        for employee_name, line_ids in line_ids_by_name.items():
+            lines = Line.browse(line_ids)
+            try:
+                if employee_name in employees:
+                    lines.write({
+                        'employee_id': employees[employee_name].id,
+                        'state': 'mapped'
+                    })
+                    mapped_count += len(lines)
+                    continue
+
+                # If no mapping is found, use the smart search
+                employee, mapping = Import._match_employee_name(
+                    employee_name, usage, len(lines), with_mapping=True)
+                if employee:
+                    # Without a reused or created mapping, check if employee
+                    # already has an active mapping with another name
+                    existing_employee = not mapping and self.env['fingerprt_hr.employee.mapping'].search([
+                        ('employee_id', '=', employee.id),
+                        ('name', '!=', employee_name),
                         ('active', '=', True)
                     ], limit=1)
                     
-                    if mapping:
-                        record.write({
-                            'employee_id': mapping.employee_id.id,
-                            'state': 'mapped'
-                        })
-                        # Update the usage counter
-                        mapping.write({
-                            'import_count': mapping.import_count + 1,
-                            'last_used': fields.Datetime.now()
+                    if existing_employee:
+                        # Do not create a new mapping if employee already has an active mapping
+                        lines.write({
+                            'state': 'error',
+                            'notes': _("Employee '%s' already has an active mapping with name '%s'") % 
+                                     (employee.name, existing_employee.name)
                         })
-                        mapped_count += 1
+                        error_count += len(lines)
                         continue
 
-                    # If no mapping is found, use the smart search
-                    employee = self.env['fingerprt_hr.import']._find_employee_by_name(record.employee_name)
-                    if employee:
-                        # Check if employee already has an active mapping
-                        existing_employee = self.env['fingerprt_hr.employee.mapping'].search([
-                            ('employee_id', '=', employee.id),
-                            ('active', '=', True)
-                        ], limit=1)
-                        
-                        if existing_employee:
-                            # Do not create a new mapping if employee already has an active mapping
-                            record.write({
-                                'state': 'error',
-                                'notes': _("Employee '%s' already has an active mapping with name '%s'") % 
-                                         (employee.name, existing_employee.name)
-                            })
-                            error_count += 1
-                            continue
-
-                        # Check if an inactive mapping exists for this combination
-                        inactive = self.env['fingerprt_hr.employee.mapping'].search([
-                            ('name', '=', record.employee_name),
-                            ('employee_id', '=', employee.id),
-                            ('active', '=', False)
-                        ], limit=1)
-                        
-                        if inactive:
-                            # Reactivate the inactive mapping
-                            inactive.write({
-                                'active': True,
-                                'import_count': inactive.import_count + 1,
-                                'last_used': fields.Datetime.now()
-                            })
-                        else:
-                            # Create a new mapping
-                            self.env['fingerprt_hr.employee.mapping'].create({
-                                'name': record.employee_name,
-                                'employee_id': employee.id,
-                                'import_id': record.import_id.id
-                            })
-
-                        # Update the line
-                        record.write({
-                            'employee_id': employee.id,
-                            'state': 'mapped'
-                        })
-                        mapped_count += 1
-
-                except Exception as e:
-                    record.write({
-                        'state': 'error',
-                        'notes': _("Error searching for mapping: %s") % str(e)
+                    # Update the lines, the mapping of the name is created by the search
+                    lines.write({
+                        'employee_id': employee.id,
+                        'state': 'mapped'
                     })
-                    error_count += 1
+                    mapped_count += len(lines)
+
+            except Exception as e:
+                lines.write({
+                    'state': 'error',
+                    'notes': _("Error searching for mapping: %s") % str(e)
+                })
+                error_count += len(lines)
+        self.env['fingerprt_hr.employee.mapping']._add_usage(usage)
+        self.env['fingerprt_hr.employee.mapping']._link_imports(line_ids=self.ids)
 
         # Notification message
         if mapped_count > 0 and error_count == 0:
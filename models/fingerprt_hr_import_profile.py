@@ -0,0 +1,94 @@
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+
+from ..tools.clock_rows import REQUIRED_ROW_FIELDS
+
+COLUMN_FIELDS = [
+    ('employee_name', 'Employee Name'),
+    ('display_id', 'Display ID'),
+    ('payroll_id', 'Payroll ID'),
+    ('department', 'Department'),
+    ('dept_code', 'Department Code'),
+    ('date', 'Date'),
+    ('in_time', 'Check-in Time'),
+    ('out_time', 'Check-out Time'),
+    ('in_note', 'Check-in Note'),
+    ('out_note', 'Check-out Note'),
+    ('reg_hours', 'Regular Hours'),
+    ('ot1_hours', 'Overtime 1'),
+    ('ot2_hours', 'Overtime 2'),
+    ('total_hours', 'Total Hours'),
+]
+
+
+class FingerprtHrImportProfile(models.Model):
+    _name = 'fingerprt_hr.import.profile'
+    _description = 'Clock Export Format'
+    _order = 'sequence, name'
+
+    name = fields.Char(string='Name', required=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    active = fields.Boolean(default=True)
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('tsv', 'TSV'),
+        ('fixed', 'Fixed Width'),
+        ('xlsx', 'Excel (XLSX)')
+    ], string='File Format', default='csv', required=True)
+    delimiter = fields.Char(string='Delimiter', default=',', size=1)
+    encoding = fields.Char(string='Encoding', default='utf-8', required=True)
+    has_header = fields.Boolean(string='Header Row', default=True,
+                                help="Find the columns by their header, otherwise by their position")
+    date_format = fields.Char(string='Date Format', default='%m/%d/%y', required=True,
+                              help="Python strptime format of the dates")
+    time_format = fields.Char(string='Time Format',
+                              help="Python strptime format of the times, the short clock notation "
+                                   "(08:30a, 05:15p) if empty")
+    column_ids = fields.One2many('fingerprt_hr.import.profile.column', 'profile_id', string='Columns', copy=True)
+    notes = fields.Text(string='Notes')
+
+    @api.constrains('column_ids')
+    def _check_columns(self):
+        """The employee name, date and check-in time columns are required"""
+        for profile in self:
+            fields_set = set(profile.column_ids.mapped('field'))
+            missing = [field for field in REQUIRED_ROW_FIELDS if field not in fields_set]
+            if missing:
+                labels = dict(COLUMN_FIELDS)
+                raise ValidationError(_("The format '%s' must define the columns: %s") % (
+                    profile.name, ', '.join(labels[field] for field in missing)))
+
+    def _get_spec(self):
+        """Return the profile as a plain dict, compiled into a row converter by the import"""
+        self.ensure_one()
+        return {
+            'file_format': self.file_format,
+            'delimiter': self.delimiter or ',',
+            'encoding': self.encoding or 'utf-8',
+            'has_header': self.has_header,
+            'date_format': self.date_format,
+            'time_format': self.time_format or None,
+            'columns': [{
+                'field': column.field,
+                'header': (column.header or '').strip(),
+                'position': column.position,
+                'width': column.width,
+            } for column in self.column_ids],
+        }
+
+
+class FingerprtHrImportProfileColumn(models.Model):
+    _name = 'fingerprt_hr.import.profile.column'
+    _description = 'Clock Export Column'
+    _order = 'profile_id, position, id'
+
+    profile_id = fields.Many2one('fingerprt_hr.import.profile', string='Format', required=True, ondelete='cascade')
+    field = fields.Selection(COLUMN_FIELDS, string='Field', required=True)
+    header = fields.Char(string='Header', help="Column header, when the file has a header row")
+    position = fields.Integer(string='Position',
+                              help="Column index starting at 0, or first character for fixed width files")
+    width = fields.Integer(string='Width', help="Number of characters, for fixed width files")
+
+    _sql_constraints = [
+        ('unique_profile_field', 'unique(profile_id, field)', 'A field can only be read from one column!')
+    ]
@@ -0,0 +1,254 @@
+from odoo import api, fields, models, _
+from odoo.exceptions import ValidationError
+import csv
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Columns of the staging table filled from the parsed lines, in order
+STAGING_COLUMNS = [
+    'employee_name', 'display_id', 'payroll_id', 'department', 'dept_code',
+    'date', 'check_in', 'check_out', 'in_note', 'out_note', 'reg_hours',
+    'ot1_hours', 'ot2_hours', 'location_id', 'row_fingerprint',
+]
+
+
+class FingerprtHrImportStaging(models.AbstractModel):
+    _name = 'fingerprt_hr.import.staging'
+    _description = 'Import Staging Pipeline'
+    _table = 'fingerprt_hr_import_staging'
+
+    def init(self):
+        # Raw rows only live until they are transferred, no need to write them to the WAL
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS %s (
+                import_id INTEGER NOT NULL,
+                row_number SERIAL,
+                employee_name VARCHAR,
+                display_id VARCHAR,
+                payroll_id VARCHAR,
+                department VARCHAR,
+                dept_code VARCHAR,
+                date DATE,
+                check_in TIMESTAMP,
+                check_out TIMESTAMP,
+                in_note VARCHAR,
+                out_note VARCHAR,
+                reg_hours DOUBLE PRECISION,
+                ot1_hours DOUBLE PRECISION,
+                ot2_hours DOUBLE PRECISION,
+                location_id INTEGER,
+                row_fingerprint VARCHAR
+            )
+        """ % self._table)
+        self.env.cr.execute("""
+            ALTER TABLE %s ADD COLUMN IF NOT EXISTS row_fingerprint VARCHAR
+        """ % self._table)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS %s_import_id_idx ON %s (import_id)
+        """ % (self._table, self._table))
+
+    @api.model
+    def _count(self, import_record):
+        """Return the number of raw rows staged for an import"""
+        self.env.cr.execute("SELECT COUNT(*) FROM %s WHERE import_id = %%s" % self._table, (import_record.id,))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _clear(self, import_record):
+        """Drop the raw rows staged for an import"""
+        self.env.cr.execute("DELETE FROM %s WHERE import_id = %%s" % self._table, (import_record.id,))
+
+    @api.model
+    def _get_staged_fingerprints(self, import_record, fingerprints):
+        """Return the fingerprints among `fingerprints` of the rows already staged for an import"""
+        if not fingerprints:
+            return set()
+        self.env.cr.execute("""
+            SELECT row_fingerprint FROM %s
+            WHERE import_id = %%s AND row_fingerprint IN %%s
+        """ % self._table, (import_record.id, tuple(fingerprints)))
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _load(self, import_record, vals_list):
+        """Stage 1: copy a batch of parsed lines into the staging table, `vals_list` may be any iterable"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for vals in vals_list:
+            count += 1
+            check_in = vals.get('check_in')
+            check_out = vals.get('check_out')
+            if check_in and check_out and check_out < check_in:
+                raise ValidationError(_('Check-out time cannot be earlier than check-in time.'))
+            row = [vals.get(column) for column in STAGING_COLUMNS]
+            writer.writerow([import_record.id] + ['' if value is None or value is False else value for value in row])
+        if not count:
+            return 0
+
+        buffer.seek(0)
+        self.env.cr.copy_expert(
+            "COPY %s (import_id, %s) FROM STDIN WITH (FORMAT csv)" % (self._table, ', '.join(STAGING_COLUMNS)),
+            buffer
+        )
+        return count
+
+    @api.model
+    def _transfer(self, import_record):
+        """Stage 2: create the import lines from the staged rows, resolving employees through the mappings.
+
+        Return the number of created lines.
+        """
+        self.env['fingerprt_hr.import.line'].flush()
+        self.env['fingerprt_hr.employee.mapping'].flush()
+        now = fields.Datetime.now()
+        uid = self.env.uid
+        columns = ', '.join(STAGING_COLUMNS)
+
+        # Lock the mappings of the staged names in id order first, so that concurrent
+        # imports updating their usage counters cannot deadlock
+        self.env.cr.execute("""
+            SELECT m.id
+            FROM fingerprt_hr_employee_mapping m
+            WHERE m.active AND m.name IN (SELECT DISTINCT employee_name FROM %s WHERE import_id = %%s)
+            ORDER BY m.id
+            FOR UPDATE OF m
+        """ % self._table, (import_record.id,))
+
+        # Create the lines and update the usage counters of the mappings from
+        # the lines actually inserted, in one statement
+        self.env.cr.execute("""
+            WITH inserted AS (
+                INSERT INTO fingerprt_hr_import_line (
+                    import_id, %(columns)s, employee_id, state,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT s.import_id, %(staged_columns)s, m.employee_id,
+                       CASE WHEN m.employee_id IS NULL THEN 'imported' ELSE 'mapped' END,
+                       %%(uid)s, %%(now)s, %%(uid)s, %%(now)s
+                FROM %(table)s s
+                LEFT JOIN fingerprt_hr_employee_mapping m ON m.name = s.employee_name AND m.active
+                WHERE s.import_id = %%(import_id)s
+                ORDER BY s.row_number
+                ON CONFLICT DO NOTHING
+                RETURNING employee_name, employee_id
+            ), counted AS (
+                UPDATE fingerprt_hr_employee_mapping m
+                SET import_count = m.import_count + u.line_count,
+                    last_used = %%(now)s, write_uid = %%(uid)s, write_date = %%(now)s
+                FROM (
+                    SELECT employee_name, COUNT(*) AS line_count
+                    FROM inserted
+                    WHERE employee_id IS NOT NULL
+                    GROUP BY employee_name
+                ) u
+                WHERE m.name = u.employee_name AND m.active
+                RETURNING m.id
+            )
+            SELECT COUNT(*) FROM inserted
+        """ % {
+            'columns': columns,
+            'staged_columns': ', '.join('s.%s' % column for column in STAGING_COLUMNS),
+            'table': self._table,
+        }, {'uid': uid, 'now': now, 'import_id': import_record.id})
+        line_count = self.env.cr.fetchone()[0]
+
+        self._clear(import_record)
+        self.env['fingerprt_hr.import.line'].invalidate_cache()
+        self.env['fingerprt_hr.employee.mapping'].invalidate_cache()
+        import_record.invalidate_cache(['line_ids'])
+        self.env['fingerprt_hr.employee.mapping']._link_imports(import_ids=[import_record.id])
+        return line_count
+
+    @api.model
+    def _create_attendances(self, import_record):
+        """Create the attendances of the mapped lines with set-based statements.
+
+        Return the number of created attendances, duplicates and errors, or
+        None if the constraints failed and the ORM must be used instead.
+        """
+        self.env['base'].flush()
+        now = fields.Datetime.now()
+        params = {
+            'import_id': import_record.id,
+            'uid': self.env.uid,
+            'now': now,
+            'duplicate_note': _("Attendance already exists and associated"),
+            'error_note': _("Error while creating attendance: %s") % _("Check-in time is required"),
+        }
+        link_duplicates = """
+            UPDATE fingerprt_hr_import_line l
+            SET attendance_id = a.id, state = 'done', notes = %(duplicate_note)s,
+                write_uid = %(uid)s, write_date = %(now)s
+            FROM hr_attendance a
+            WHERE l.import_id = %(import_id)s
+              AND l.state = 'mapped'
+              AND l.employee_id IS NOT NULL
+              AND a.employee_id = l.employee_id
+              AND a.check_in = l.check_in
+              AND a.location_id IS NOT DISTINCT FROM l.location_id
+        """
+
+        try:
+            with self.env.cr.savepoint():
+                cr = self.env.cr
+
+                # Lines without check-in cannot become attendances
+                cr.execute("""
+                    UPDATE fingerprt_hr_import_line
+                    SET state = 'error', notes = %(error_note)s, write_uid = %(uid)s, write_date = %(now)s
+                    WHERE import_id = %(import_id)s AND state = 'mapped'
+                      AND employee_id IS NOT NULL AND check_in IS NULL
+                """, params)
+                error_count = cr.rowcount
+
+                # Attendances that already exist
+                cr.execute(link_duplicates, params)
+                duplicate_count = cr.rowcount
+
+                # One attendance per employee, check-in and location
+                cr.execute("""
+                    INSERT INTO hr_attendance (
+                        employee_id, check_in, check_out, location_id, source, import_id, import_line_id,
+                        create_uid, create_date, write_uid, write_date
+                    )
+                    SELECT DISTINCT ON (l.employee_id, l.check_in, l.location_id)
+                           l.employee_id, l.check_in, l.check_out, l.location_id, 'import', l.import_id, l.id,
+                           %(uid)s, %(now)s, %(uid)s, %(now)s
+                    FROM fingerprt_hr_import_line l
+                    WHERE l.import_id = %(import_id)s
+                      AND l.state = 'mapped'
+                      AND l.employee_id IS NOT NULL
+                    ORDER BY l.employee_id, l.check_in, l.location_id, l.id
+                    RETURNING id
+                """, params)
+                attendance_ids = [row[0] for row in cr.fetchall()]
+
+                # Link the lines to their new attendance
+                cr.execute("""
+                    UPDATE fingerprt_hr_import_line l
+                    SET attendance_id = a.id, state = 'done', write_uid = %(uid)s, write_date = %(now)s
+                    FROM hr_attendance a
+                    WHERE a.import_line_id = l.id AND l.import_id = %(import_id)s AND l.state = 'mapped'
+                """, params)
+
+                # Repeated lines of the file are duplicates of the attendance just created
+                cr.execute(link_duplicates, params)
+                duplicate_count += cr.rowcount
+
+                # Let the ORM compute the stored fields and check the new attendances
+                self.env['hr.attendance'].invalidate_cache()
+                self.env['fingerprt_hr.import.line'].invalidate_cache()
+                attendances = self.env['hr.attendance'].browse(attendance_ids)
+                attendances.modified(['employee_id', 'check_in', 'check_out'])
+                self.env['base'].flush()
+                attendances._check_validity()
+        except Exception as e:
+            _logger.warning("Set-based attendance creation failed, using the ORM: %s", e)
+            self.env.invalidate_all()
+            return None
+
+        import_record.invalidate_cache(['line_ids'])
+        return len(attendance_ids), duplicate_count, error_count
@@ -10,3 +10,37 @@ class FingerprtHrLocation(models.Model):
     active = fields.Boolean(default=True)
     company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
     notes = fields.Text(string='Notes')
+    last_check_in = fields.Datetime(string='Last Imported Check-in', readonly=True,
+                                    help="Latest check-in imported for this location, "
+                                         "older rows are skipped by delta imports")
+
+    def _update_last_check_in(self, import_record=None):
+        """Store the latest check-in imported for each location.
+
+        With an `import_record`, only its lines are read and can move the
+        latest check-in forward. Otherwise it is recomputed from all the
+        lines of the location, when an import is cancelled. The lines of the
+        cancelled and failed imports are left out, their rows can be imported
+        again.
+        """
+        self.env['fingerprt_hr.import.line'].flush(['check_in', 'location_id', 'import_id'])
+        if import_record:
+            self.env.cr.execute("""
+                UPDATE fingerprt_hr_location loc
+                SET last_check_in = GREATEST(loc.last_check_in, (
+                    SELECT MAX(l.check_in)
+                    FROM fingerprt_hr_import_line l
+                    WHERE l.import_id = %s AND l.location_id = loc.id
+                ))
+                WHERE loc.id IN %s
+            """, (import_record.id, tuple(self.ids)))
+            self.invalidate_cache(['last_check_in'])
+            return
+        for location in self:
+            self.env.cr.execute("""
+                SELECT MAX(l.check_in)
+                FROM fingerprt_hr_import_line l
+                JOIN fingerprt_hr_import i ON i.id = l.import_id
+                WHERE l.location_id = %s AND i.state NOT IN ('cancelled', 'error')
+            """, (location.id,))
+            location.last_check_in = self.env.cr.fetchone()[0]
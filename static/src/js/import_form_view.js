@@ -5,6 +5,9 @@ odoo.define('fingerprt_hr.import_form_view', function (require) {
     var core = require('web.core');
     var _t = core._t;
 
+    // Delay between two reloads of an import waiting for a background job
+    var IMPORT_POLL_DELAY = 5000;
+
     FormController.include({
         /**
          * @override
@@ -16,6 +19,43 @@ odoo.define('fingerprt_hr.import_form_view', function (require) {
             });
         },
 
+        /**
+         * @override
+         */
+        destroy: function () {
+            clearTimeout(this._importPollTimeout);
+            this._super.apply(this, arguments);
+        },
+
+        /**
+         * @override
+         */
+        _update: function () {
+            var self = this;
+            return this._super.apply(this, arguments).then(function () {
+                self._scheduleImportPolling();
+            });
+        },
+
+        /**
+         * Reload an import form while one of its background jobs is running
+         * @private
+         */
+        _scheduleImportPolling: function () {
+            var self = this;
+            clearTimeout(this._importPollTimeout);
+            if (this.modelName !== 'fingerprt_hr.import' || this.mode !== 'readonly') {
+                return;
+            }
+            var record = this.model.get(this.handle, {raw: true});
+            if (!record || !record.data.job_running) {
+                return;
+            }
+            this._importPollTimeout = setTimeout(function () {
+                self.reload();
+            }, IMPORT_POLL_DELAY);
+        },
+
         /**
          * Display message stored in context
          * @private
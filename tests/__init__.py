@@ -0,0 +1,4 @@
+from . import test_clock_parser
+from . import test_file_stream
+from . import test_name_matching
+from . import test_row_buffer
@@ -0,0 +1,56 @@
+from datetime import date, datetime, time
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools import clock_parser
+from ..tools.clock_parser import ClockDateTimeParser
+from ..tools.clock_rows import compile_row_converter
+
+
+@tagged('post_install', '-at_install')
+class TestClockParser(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.parser = ClockDateTimeParser()
+
+    def test_parse_time_clock_notation(self):
+        """Times use the a/p notation of the clocks, noon and midnight included"""
+        self.assertEqual(self.parser.parse_time('08:30a'), time(8, 30))
+        self.assertEqual(self.parser.parse_time('08:30p'), time(20, 30))
+        self.assertEqual(self.parser.parse_time('12:05a'), time(0, 5))
+        self.assertEqual(self.parser.parse_time('12:05p'), time(12, 5))
+        self.assertEqual(self.parser.parse_time(' 9:00P '), time(21, 0))
+
+    def test_parse_time_format(self):
+        """A profile time format replaces the a/p notation"""
+        parser = ClockDateTimeParser(time_format='%H:%M')
+        self.assertEqual(parser.parse_time('17:45'), time(17, 45))
+        with self.assertLogs(clock_parser._logger, 'ERROR'):
+            self.assertIsNone(parser.parse_time('05:45p'))
+
+    def test_invalid_values_cached(self):
+        """Invalid values give None and are only logged once"""
+        with self.assertLogs(clock_parser._logger, 'ERROR') as logs:
+            for _i in range(3):
+                self.assertIsNone(self.parser.parse_date('13/45/20'))
+                self.assertIsNone(self.parser.parse_time('25:00x'))
+                self.assertIsNone(self.parser.combine('13/45/20', '08:00a'))
+        self.assertEqual(len(logs.records), 2)
+
+    def test_combine(self):
+        """A date and a time give a datetime, a missing one gives None"""
+        self.assertEqual(self.parser.combine('03/14/24', '07:15a'), datetime(2024, 3, 14, 7, 15))
+        self.assertIs(self.parser.combine('03/14/24', '07:15a'), self.parser.combine('03/14/24', '07:15a'))
+        self.assertIsNone(self.parser.combine('03/14/24', ''))
+        self.assertIsNone(self.parser.combine('', '07:15a'))
+
+    def test_overnight_check_out(self):
+        """A check-out earlier than the check-in is on the next day"""
+        convert = compile_row_converter({'employee_name': 0, 'date': 1, 'in_time': 2, 'out_time': 3}, self.parser)
+        vals = convert(['Jean Martin', '03/14/24', '10:00p', '06:00a'])
+        self.assertEqual(vals['date'], date(2024, 3, 14))
+        self.assertEqual(vals['check_in'], datetime(2024, 3, 14, 22, 0))
+        self.assertEqual(vals['check_out'], datetime(2024, 3, 15, 6, 0))
+        self.assertIsNone(convert(['Jean Martin', '03/14/24', '', '06:00a']))
@@ -0,0 +1,71 @@
+import base64
+import gzip
+import io
+import unittest
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools.clock_rows import parse_clock_data
+from ..tools.file_stream import (
+    Base64ChunkReader, is_clock_file_name, open_decompressed_stream, open_text_stream, zstandard
+)
+
+CLOCK_DATA = (
+    "Display Name,Date,In Time,Out Time\n"
+    "Jean Martin,03/14/24,10:00p,06:00a\n"
+    "Marie Dubois,03/15/24,08:30a,05:00p\n"
+).encode('utf-8')
+
+
+@tagged('post_install', '-at_install')
+class TestFileStream(BaseCase):
+
+    def test_base64_chunks(self):
+        """The payload is decoded whatever the chunk size and the line breaks of the encoder"""
+        payload = bytes(range(256)) * 20
+        for encoded in [base64.b64encode(payload), base64.encodebytes(payload), base64.encodebytes(payload).decode()]:
+            for chunk_size in [4, 5, 77, 1000, 64 * 1024]:
+                stream = io.BufferedReader(Base64ChunkReader(encoded, chunk_size), 13)
+                self.assertEqual(stream.read(), payload, chunk_size)
+
+    def test_base64_invalid(self):
+        """Invalid base64 content raises a ValueError"""
+        with self.assertRaises(ValueError):
+            Base64ChunkReader(b'abc*defg').read()
+        self.assertEqual(Base64ChunkReader(False).read(), b'')
+
+    def test_text_stream(self):
+        """The text is decoded across the chunks, multibyte characters included"""
+        text = 'Hélène Dupré,03/14/24\n' * 50
+        stream = open_text_stream(Base64ChunkReader(base64.b64encode(text.encode('utf-8')), 8))
+        self.assertEqual(stream.read(), text)
+
+    def test_gzip(self):
+        """Gzip files are decompressed on the fly, the others are read as they are"""
+        stream = open_decompressed_stream(io.BytesIO(gzip.compress(CLOCK_DATA)), 'export.CSV.gz')
+        self.assertEqual(stream.read(), CLOCK_DATA)
+        self.assertEqual(open_decompressed_stream(io.BytesIO(CLOCK_DATA), 'export.csv').read(), CLOCK_DATA)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstandard(self):
+        """Zstandard files are decompressed on the fly"""
+        data = zstandard.ZstdCompressor().compress(CLOCK_DATA)
+        self.assertEqual(open_decompressed_stream(io.BytesIO(data), 'export.csv.zst').read(), CLOCK_DATA)
+
+    def test_clock_file_name(self):
+        """Clock exports are recognized by their extension, compressed or not"""
+        for file_name in ['export.csv', 'EXPORT.TSV', 'export.txt.gz', 'export.xlsx.zst', 'export.csv.gz']:
+            self.assertTrue(is_clock_file_name(file_name), file_name)
+        for file_name in ['export.pdf', 'export.gz', 'export.csv.zip', '', False]:
+            self.assertFalse(is_clock_file_name(file_name), file_name)
+
+    def test_parse_compressed_data(self):
+        """A compressed export is parsed, a corrupted one gives an error instead of rows"""
+        rows, error = parse_clock_data(gzip.compress(CLOCK_DATA), 'export.csv.gz')
+        self.assertIsNone(error)
+        self.assertEqual([vals['employee_name'] for line_num, vals, row_error in rows],
+                         ['Jean Martin', 'Marie Dubois'])
+        rows, error = parse_clock_data(CLOCK_DATA, 'export.csv.gz')
+        self.assertIsNone(rows)
+        self.assertTrue(error)
@@ -0,0 +1,93 @@
+import random
+from unittest.mock import patch
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools import name_matching
+from ..tools.name_matching import (
+    MATCH_THRESHOLD, PARALLEL_MATCH_MIN_NAMES, EmployeeNameIndex, best_matches, normalize_name
+)
+
+FIRST_NAMES = ['jean', 'jeanne', 'marie', 'mario', 'pierre', 'pierrot', 'paul', 'paule', 'anne', 'annie',
+               'louis', 'louise', 'michel', 'michele', 'nicolas', 'nicole', 'eric', 'erica', 'yves', 'ali']
+LAST_NAMES = ['martin', 'martins', 'bernard', 'bernardi', 'dubois', 'dubos', 'thomas', 'thoma', 'robert',
+              'roberts', 'richard', 'ricard', 'petit', 'petitjean', 'durand', 'durant', 'leroy', 'le roi']
+
+
+def generate_names(rng, count):
+    """Return random names sharing many words, with some typos and single words"""
+    names = []
+    for _i in range(count):
+        words = [rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)]
+        if rng.random() < 0.2:
+            words.append(rng.choice(LAST_NAMES))
+        if rng.random() < 0.1:
+            words = words[:1]
+        name = ' '.join(rng.sample(words, len(words)))
+        if rng.random() < 0.3:
+            position = rng.randrange(len(name))
+            name = name[:position] + rng.choice('aeiourst') + name[position + 1:]
+        names.append(name)
+    return names
+
+
+@tagged('post_install', '-at_install')
+class TestNameMatching(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.rng = random.Random(42)
+        names = generate_names(self.rng, 300)
+        self.index = EmployeeNameIndex([(i + 1, name, normalize_name(name)) for i, name in enumerate(names)])
+        self.queries = [normalize_name(name) for name in generate_names(self.rng, 60)]
+
+    def _scan_top_matches(self, normalized_name, limit, min_score, exclude=()):
+        """Score every entry of the index"""
+        matches = []
+        for index, entry in enumerate(self.index.entries):
+            if entry[0] in exclude:
+                continue
+            score = self.index.score(normalized_name, entry)
+            if score >= min_score:
+                matches.append((-score, index))
+        matches.sort()
+        return [(self.index.entries[index], -score) for score, index in matches[:limit]]
+
+    def test_top_matches_scan(self):
+        """The suggestions are the ones of a full scan"""
+        for limit, min_score in [(1, 0.1), (3, 0.3), (5, 0.6), (20, 0.5)]:
+            for query in self.queries:
+                self.assertEqual(self.index.top_matches(query, limit, min_score),
+                                 self._scan_top_matches(query, limit, min_score), query)
+
+    def test_top_matches_exclude(self):
+        """The excluded employees are left out of the suggestions"""
+        for query in self.queries:
+            exclude = {entry[0] for entry, score in self.index.top_matches(query, 2, 0.3)}
+            self.assertEqual(self.index.top_matches(query, 3, 0.3, exclude=exclude),
+                             self._scan_top_matches(query, 3, 0.3, exclude=exclude), query)
+
+    def test_top_matches_short_name(self):
+        """Names too short to be compared get no suggestion"""
+        self.assertEqual(self.index.top_matches('ali', 3, 0.0), [])
+        self.assertEqual(self.index.top_matches('', 3, 0.0), [])
+
+    def test_best_match_pruning(self):
+        """The shortlisted candidates give the best match of a full scan whenever it reaches the threshold"""
+        for threshold in [MATCH_THRESHOLD, 0.7, 0.5]:
+            for query in self.queries:
+                employee_id, score = self.index.best_match(query)
+                if score >= threshold:
+                    self.assertEqual(self.index.best_match(query, threshold), (employee_id, score), query)
+                else:
+                    self.assertLess(self.index.best_match(query, threshold)[1], threshold, query)
+
+    def test_best_matches_parallel(self):
+        """The names scored by the worker processes get the same matches as scored one by one"""
+        queries = [normalize_name(name) for name in generate_names(self.rng, PARALLEL_MATCH_MIN_NAMES + 50)]
+        expected = [self.index.best_match(query, MATCH_THRESHOLD) for query in queries]
+        with patch.object(name_matching.os, 'cpu_count', return_value=2), \
+                patch.object(name_matching._logger, 'warning') as warning:
+            self.assertEqual(best_matches(queries, self.index, MATCH_THRESHOLD), expected)
+        warning.assert_not_called()
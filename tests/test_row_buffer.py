@@ -0,0 +1,60 @@
+from datetime import date, datetime
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools.row_buffer import ClockRowBuffer
+
+
+def make_vals(employee_name, check_in, check_out=False):
+    return {
+        'employee_name': employee_name, 'display_id': '42', 'payroll_id': '', 'department': 'Sales',
+        'dept_code': 'S1', 'date': check_in.date(), 'check_in': check_in, 'check_out': check_out,
+        'in_note': '', 'out_note': 'late', 'reg_hours': 7.5, 'ot1_hours': 0.0, 'ot2_hours': 1.25,
+        'total_hours': 8.75, 'row_fingerprint': 'f%d' % check_in.day,
+    }
+
+
+@tagged('post_install', '-at_install')
+class TestRowBuffer(BaseCase):
+
+    def test_round_trip(self):
+        """The rows are read back as appended, with their line numbers and errors"""
+        rows = ClockRowBuffer()
+        first = make_vals('Jean Martin', datetime(2024, 3, 14, 22, 0), datetime(2024, 3, 15, 6, 0))
+        second = make_vals('Marie Dubois', datetime(2024, 3, 15, 8, 30))
+        rows.append(2, first)
+        rows.append(3, None, 'Error line 3 (Paul): invalid time')
+        rows.append(4, second)
+        rows.append(5, None)
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(list(rows), [
+            (2, first, None),
+            (3, None, 'Error line 3 (Paul): invalid time'),
+            (4, second, None),
+            (5, None, None),
+        ])
+        self.assertEqual(rows.get_fingerprint(2), 'f15')
+        self.assertEqual(rows.get_check_out(0), datetime(2024, 3, 15, 6, 0))
+        self.assertFalse(rows.get_check_out(2))
+        self.assertEqual(rows.get_vals(2)['date'], date(2024, 3, 15))
+
+    def test_iter_vals(self):
+        """Only the rows with values are yielded, completed with the extra values"""
+        rows = ClockRowBuffer()
+        for day in range(1, 4):
+            rows.append(day, make_vals('Jean Martin', datetime(2024, 3, day, 8, 0)))
+        rows.append(4, None, 'Error')
+        vals_list = list(rows.iter_vals([0, 2, 3], {'import_id': 7}))
+        self.assertEqual([vals['check_in'].day for vals in vals_list], [1, 3])
+        self.assertTrue(all(vals['import_id'] == 7 for vals in vals_list))
+        rows.clear()
+        self.assertEqual(len(rows), 0)
+
+    def test_interned_strings(self):
+        """A name repeated on many rows is stored once"""
+        rows = ClockRowBuffer()
+        for day in range(1, 3):
+            rows.append(day, make_vals(''.join(['Jean ', 'Martin']), datetime(2024, 3, day, 8, 0)))
+        self.assertIs(rows.get_vals(0)['employee_name'], rows.get_vals(1)['employee_name'])
@@ -0,0 +1,98 @@
+from datetime import datetime, time
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class ClockDateTimeParser(object):
+    """Parse the dates (mm/dd/yy) and times (HH:MMa/p) of a clock export.
+
+    A file only holds a few dozen distinct dates and a few hundred distinct
+    times, so every parsed value is cached for the lifetime of the parser
+    (one import) and invalid values are only logged once. Without a
+    `time_format`, times use the short a/p clock notation.
+    """
+
+    def __init__(self, date_format='%m/%d/%y', time_format=None):
+        self.date_format = date_format
+        self.time_format = time_format
+        self._dates = {}
+        self._times = {}
+        self._datetimes = {}
+
+    def parse_date(self, date_str):
+        """Return the date of a string, None if it is invalid"""
+        try:
+            return self._dates[date_str]
+        except KeyError:
+            pass
+        try:
+            value = datetime.strptime(date_str, self.date_format).date()
+        except (TypeError, ValueError) as e:
+            _logger.error("Invalid date '%s': %s", date_str, e)
+            value = None
+        self._dates[date_str] = value
+        return value
+
+    def parse_time(self, time_str):
+        """Return the time of a 12h string such as '08:30a', None if it is invalid"""
+        try:
+            return self._times[time_str]
+        except KeyError:
+            pass
+        value = self._parse_time(time_str)
+        self._times[time_str] = value
+        return value
+
+    def _parse_time(self, time_str):
+        if self.time_format:
+            try:
+                return datetime.strptime(time_str, self.time_format).time()
+            except (TypeError, ValueError) as e:
+                _logger.error("Invalid time '%s': %s", time_str, e)
+                return None
+
+        value = (time_str or '').strip()
+        if len(value) < 2:
+            _logger.error("Invalid time string: '%s'", time_str)
+            return None
+
+        # Check AM/PM marker
+        am_pm = value[-1].lower()
+        if am_pm not in ('a', 'p'):
+            _logger.error("Invalid AM/PM marker: %s", value[-1])
+            return None
+
+        # Extract hours and minutes
+        time_parts = value[:-1].split(':')
+        if len(time_parts) != 2:
+            _logger.error("Invalid time format: %s", time_str)
+            return None
+
+        try:
+            hours = int(time_parts[0])
+            minutes = int(time_parts[1])
+            # Convert to 24h format
+            if am_pm == 'p' and hours < 12:
+                hours += 12
+            elif am_pm == 'a' and hours == 12:
+                hours = 0
+            return time(hours, minutes)
+        except ValueError as e:
+            _logger.error("Conversion error for time '%s': %s", time_str, e)
+            return None
+
+    def combine(self, date_str, time_str):
+        """Return the datetime of a date and a time string, None if one is missing or invalid"""
+        if not date_str or not time_str:
+            return None
+        key = (date_str, time_str)
+        try:
+            return self._datetimes[key]
+        except KeyError:
+            pass
+        date = self.parse_date(date_str)
+        day_time = self.parse_time(time_str)
+        value = datetime.combine(date, day_time) if date and day_time else None
+        self._datetimes[key] = value
+        return value
@@ -0,0 +1,236 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from operator import itemgetter
+
+from .clock_parser import ClockDateTimeParser
+from .file_stream import CHUNK_SIZE, open_decompressed_stream, open_text_stream
+from .row_buffer import ClockRowBuffer
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Fields read from a clock export, in the order of the compiled row tuples
+ROW_FIELDS = (
+    'employee_name', 'display_id', 'payroll_id', 'department', 'dept_code', 'date',
+    'in_time', 'out_time', 'in_note', 'out_note', 'reg_hours', 'ot1_hours', 'ot2_hours',
+    'total_hours',
+)
+
+# Fields without which no line can be built
+REQUIRED_ROW_FIELDS = ('employee_name', 'date', 'in_time')
+
+# Size up to which a workbook is spooled in memory, larger ones go to a temporary file
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Layout of the clock exports supported originally, used when an import has no profile
+DEFAULT_PROFILE_SPEC = {
+    'file_format': 'csv',
+    'delimiter': ',',
+    'encoding': 'utf-8',
+    'has_header': True,
+    'date_format': '%m/%d/%y',
+    'time_format': None,
+    'columns': [
+        {'field': 'employee_name', 'header': 'Display Name'},
+        {'field': 'display_id', 'header': 'Display ID'},
+        {'field': 'payroll_id', 'header': 'Payroll ID'},
+        {'field': 'department', 'header': 'Department'},
+        {'field': 'dept_code', 'header': 'Dept. Code'},
+        {'field': 'date', 'header': 'Date'},
+        {'field': 'in_time', 'header': 'In Time'},
+        {'field': 'out_time', 'header': 'Out Time'},
+        {'field': 'in_note', 'header': 'In Note'},
+        {'field': 'out_note', 'header': 'Out Note'},
+        {'field': 'reg_hours', 'header': 'REG'},
+        {'field': 'ot1_hours', 'header': 'OT1'},
+        {'field': 'ot2_hours', 'header': 'OT2'},
+        {'field': 'total_hours', 'header': 'Total'},
+    ],
+}
+
+
+def compile_row_converter(positions, parser):
+    """Compile a converter of raw rows (sequences of cells) into line values.
+
+    `positions` maps the fields of ROW_FIELDS to their cell index. All the
+    column lookups are resolved here once, a row is then converted with a
+    single tuple extraction. The converter returns None for the rows
+    without check-in.
+    """
+    width = max(positions.values()) + 1
+    # Missing fields read the empty cell appended after the last used column
+    getter = itemgetter(*[positions.get(field, width) for field in ROW_FIELDS])
+    padding = [''] * (width + 1)
+    combine = parser.combine
+    parse_date = parser.parse_date
+    one_day = timedelta(days=1)
+
+    def convert(row):
+        cells = list(row[:width])
+        (employee_name, display_id, payroll_id, department, dept_code, date_str, in_time, out_time,
+         in_note, out_note, reg_hours, ot1_hours, ot2_hours, total_hours) = getter(cells + padding[len(cells):])
+
+        # Convert dates and times, parsed values are cached by the parser
+        date_str = date_str.strip()
+        check_in = combine(date_str, in_time.strip())
+        check_out = combine(date_str, out_time.strip())
+
+        # If no check-in, skip the line
+        if not check_in:
+            return None
+
+        # If check_out is before check_in, add a day
+        if check_out and check_out < check_in:
+            check_out += one_day
+
+        return {
+            'employee_name': employee_name.strip(),
+            'display_id': display_id.strip(),
+            'payroll_id': payroll_id.strip(),
+            'department': department.strip(),
+            'dept_code': dept_code.strip(),
+            'date': parse_date(date_str),
+            'check_in': check_in,
+            'check_out': check_out or False,
+            'in_note': in_note.strip(),
+            'out_note': out_note.strip(),
+            'reg_hours': float(reg_hours or '0'),
+            'ot1_hours': float(ot1_hours or '0'),
+            'ot2_hours': float(ot2_hours or '0'),
+            'total_hours': float(total_hours or '0'),
+        }
+
+    return convert
+
+
+def _resolve_positions(spec, header):
+    """Return the cell index of each field, from the header row or the column positions"""
+    positions = {}
+    if header is not None:
+        header_index = {}
+        for index, name in enumerate(header):
+            header_index.setdefault((name or '').strip().lstrip('\ufeff'), index)
+        for column in spec['columns']:
+            if column.get('header') in header_index:
+                positions[column['field']] = header_index[column['header']]
+    else:
+        for index, column in enumerate(spec['columns']):
+            positions[column['field']] = index if spec['file_format'] == 'fixed' else column.get('position', index)
+
+    missing = [field for field in REQUIRED_ROW_FIELDS if field not in positions]
+    if missing:
+        raise ValueError("Missing columns in the file: %s" % ', '.join(missing))
+    return positions
+
+
+def _iter_delimited_rows(binary_stream, spec):
+    """Yield (line number, cells) for each row of a CSV or TSV file"""
+    delimiter = '\t' if spec['file_format'] == 'tsv' else spec.get('delimiter') or ','
+    reader = csv.reader(open_text_stream(binary_stream, spec.get('encoding') or 'utf-8'), delimiter=delimiter)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_fixed_width_rows(binary_stream, spec):
+    """Yield (line number, cells) for each line of a fixed-width file, one cell per profile column"""
+    slices = [slice(column.get('position', 0), column.get('position', 0) + (column.get('width') or 0))
+              for column in spec['columns']]
+    text_stream = open_text_stream(binary_stream, spec.get('encoding') or 'utf-8')
+    for line_num, line in enumerate(text_stream, 1):
+        line = line.rstrip('\r\n')
+        if line.strip():
+            yield line_num, [line[cell] for cell in slices]
+
+
+def _iter_xlsx_rows(binary_stream, spec):
+    """Yield (line number, cells) for each row of the first sheet of a workbook, read in streaming mode.
+
+    The zip archive needs random access: the stream is copied chunk by chunk
+    into a temporary file, kept in memory up to XLSX_SPOOL_SIZE bytes.
+    """
+    if openpyxl is None:
+        raise ValueError("The openpyxl Python library is required to read XLSX files")
+    date_format = spec.get('date_format') or '%m/%d/%y'
+    time_format = spec.get('time_format')
+
+    def format_cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime) and value.time() == time(0):
+            return value.strftime(date_format)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return value.strftime(date_format)
+        if isinstance(value, (time, datetime)):
+            if time_format:
+                return value.strftime(time_format)
+            return value.strftime('%I:%M') + ('p' if value.hour >= 12 else 'a')
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE) as spool:
+        shutil.copyfileobj(binary_stream, spool, CHUNK_SIZE)
+        spool.seek(0)
+        workbook = openpyxl.load_workbook(spool, read_only=True, data_only=True)
+        try:
+            for line_num, row in enumerate(workbook.worksheets[0].iter_rows(values_only=True), 1):
+                yield line_num, [format_cell(value) for value in row]
+        finally:
+            workbook.close()
+
+
+ROW_READERS = {
+    'csv': _iter_delimited_rows,
+    'tsv': _iter_delimited_rows,
+    'fixed': _iter_fixed_width_rows,
+    'xlsx': _iter_xlsx_rows,
+}
+
+
+def iter_clock_rows(binary_stream, spec=None):
+    """Yield (line number, values, error) for each row of a clock export.
+
+    The file is read according to the format profile `spec`, the default
+    clock layout if not set. Values are None for the rows without check-in
+    and for the rows in error, in which case the error message is set.
+    """
+    spec = spec or DEFAULT_PROFILE_SPEC
+    parser = ClockDateTimeParser(spec.get('date_format') or '%m/%d/%y', spec.get('time_format') or None)
+    rows = ROW_READERS[spec.get('file_format') or 'csv'](binary_stream, spec)
+
+    header = None
+    if spec.get('has_header', True) and spec.get('file_format') != 'fixed':
+        header = next(rows, (0, []))[1]
+    positions = _resolve_positions(spec, header)
+    convert = compile_row_converter(positions, parser)
+    name_index = positions['employee_name']
+
+    for line_num, row in rows:
+        try:
+            yield line_num, convert(row), None
+        except Exception as e:
+            employee_name = (row[name_index] if name_index < len(row) else '') or 'unknown'
+            yield line_num, None, f"Error line {line_num} ({employee_name.strip()}): {str(e)}"
+
+
+def parse_clock_data(data, file_name='', spec=None):
+    """Parse a whole clock export held in memory, used by the batch import worker processes.
+
+    Return (rows, error). The rows are returned in a ClockRowBuffer,
+    compact to hold and to send back from a worker process. A file that
+    cannot be read (missing columns, wrong encoding, corrupted or
+    unsupported compression) gives no rows and the error message instead,
+    so that it does not stop the parsing of the other files.
+    """
+    rows = ClockRowBuffer()
+    try:
+        for line_num, vals, error in iter_clock_rows(open_decompressed_stream(io.BytesIO(data), file_name), spec):
+            rows.append(line_num, vals, error)
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__
+    return rows, None
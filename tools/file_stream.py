@@ -0,0 +1,84 @@
+import base64
+import binascii
+import gzip
+import io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+
+# File name suffixes accepted for clock exports, possibly followed by a compression suffix
+CLOCK_FILE_EXTENSIONS = ('.csv', '.tsv', '.txt', '.xlsx')
+COMPRESSION_EXTENSIONS = ('.gz', '.zst')
+
+
+class Base64ChunkReader(io.RawIOBase):
+    """Binary stream decoding a base64 payload chunk by chunk"""
+
+    def __init__(self, data, chunk_size=CHUNK_SIZE):
+        if isinstance(data, str):
+            data = data.encode('ascii')
+        self._data = data or b''
+        self._pos = 0
+        self._chunk_size = max(4, chunk_size - chunk_size % 4)
+        self._carry = b''
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        """Decode the next chunk of the payload into the internal buffer"""
+        while not self._buffer and self._pos < len(self._data):
+            chunk = self._data[self._pos:self._pos + self._chunk_size]
+            self._pos += len(chunk)
+            # Ignore line breaks inserted by some encoders
+            chunk = self._carry + b''.join(chunk.split())
+            if self._pos >= len(self._data):
+                usable = len(chunk)
+            else:
+                usable = len(chunk) - len(chunk) % 4
+            self._carry = chunk[usable:]
+            try:
+                self._buffer = base64.b64decode(chunk[:usable])
+            except binascii.Error as e:
+                raise ValueError("Invalid base64 content: %s" % e)
+
+    def readinto(self, b):
+        self._fill()
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def open_text_stream(binary_stream, encoding='utf-8'):
+    """Wrap a binary stream into an incrementally decoded text stream for csv"""
+    if isinstance(binary_stream, io.RawIOBase):
+        binary_stream = io.BufferedReader(binary_stream, CHUNK_SIZE)
+    return io.TextIOWrapper(binary_stream, encoding=encoding, newline='')
+
+
+def is_clock_file_name(file_name):
+    """Return whether a file name is a clock export, compressed or not"""
+    lower_name = (file_name or '').lower()
+    for extension in COMPRESSION_EXTENSIONS:
+        if lower_name.endswith(extension):
+            lower_name = lower_name[:-len(extension)]
+            break
+    return lower_name.endswith(CLOCK_FILE_EXTENSIONS)
+
+
+def open_decompressed_stream(binary_stream, file_name):
+    """Wrap a binary stream into a stream decompressing it on the fly according to the file name"""
+    lower_name = (file_name or '').lower()
+    if lower_name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=binary_stream, mode='rb')
+    if lower_name.endswith('.zst'):
+        if zstandard is None:
+            raise ValueError("The zstandard Python library is required to read .zst files")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(binary_stream), CHUNK_SIZE)
+    return binary_stream
@@ -0,0 +1,321 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import Counter, defaultdict
+from functools import lru_cache
+import difflib
+import heapq
+import logging
+import math
+import os
+import re
+import unicodedata
+
+_logger = logging.getLogger(__name__)
+
+# Words ignored when comparing names
+COMMON_WORDS = frozenset(['le', 'la', 'les', 'de', 'du', 'des', 'un', 'une', 'et', 'a', 'au', 'aux'])
+
+# Minimum score of an automatic match
+MATCH_THRESHOLD = 0.85
+
+# Minimum score of an automatic match between names with the same phonetic key
+PHONETIC_MATCH_THRESHOLD = 0.7
+
+# Number of names from which they are scored on all cores, and names per task
+PARALLEL_MATCH_MIN_NAMES = 200
+PARALLEL_MATCH_CHUNK_SIZE = 100
+
+# Spelling variants folded by the phonetic code, applied in order
+PHONETIC_RULES = [
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'[cq]u(?=[aeiouy])'), 'k'),
+    (re.compile(r'ck'), 'k'),
+    (re.compile(r'c(?=[eiy])'), 's'),
+    (re.compile(r'[cq]'), 'k'),
+    (re.compile(r'gu(?=[eiy])'), 'g'),
+    (re.compile(r'g(?=[eiy])'), 'j'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'y'), 'i'),
+    (re.compile(r'h'), ''),
+    # Silent French endings
+    (re.compile(r'(?<=.)[sx]$'), ''),
+    (re.compile(r'd$'), 't'),
+]
+
+
+@lru_cache(maxsize=20000)
+def normalize_name(name):
+    """Normalize a name for comparison, memoized as the same names come back on every import"""
+    if not name:
+        return ""
+
+    # Convert to lowercase
+    name = name.lower()
+
+    # Remove accents
+    name = ''.join(c for c in unicodedata.normalize('NFD', name)
+                   if unicodedata.category(c) != 'Mn')
+
+    # Remove special characters and digits
+    name = re.sub(r'[^a-z ]', '', name)
+
+    # Remove multiple spaces
+    name = re.sub(r'\s+', ' ', name).strip()
+
+    # Remove common words and short words
+    words = [w for w in name.split() if w not in COMMON_WORDS and len(w) > 1]
+    return ' '.join(words)
+
+
+def phonetic_code(word):
+    """Return the phonetic code of a normalized word: its first letter and its folded consonants"""
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    if not word:
+        return ''
+    code = word[0] + re.sub(r'[aeiou]', '', word[1:])
+    # Double letters sound like single ones
+    return re.sub(r'(.)\1+', r'\1', code)
+
+
+def phonetic_key(name):
+    """Return the phonetic key of a name, independent of the order of its words"""
+    # Compound names are coded word by word
+    words = normalize_name(re.sub(r'[-_.]', ' ', name or '')).split()
+    return ' '.join(sorted(filter(None, (phonetic_code(word) for word in words))))
+
+
+def is_name_too_short(normalized_name):
+    """Return whether a normalized name is empty or a single short word, too vague to be matched"""
+    return not normalized_name or (len(normalized_name.split()) == 1 and len(normalized_name) < 5)
+
+
+def name_bigrams(normalized_name):
+    """Return the multiset of the character bigrams of a name"""
+    return Counter(normalized_name[i:i + 2] for i in range(len(normalized_name) - 1))
+
+
+def min_shared_bigrams(length1, length2, threshold):
+    """Return the number of bigrams two names share at least when their sequence similarity reaches the threshold.
+
+    A ratio of 2M / (length1 + length2) needs M matching characters forming a
+    common subsequence. Each of the length1 + length2 - 2M unmatched characters
+    breaks at most one bigram of that subsequence, so the names share at
+    least M - 1 - (length1 + length2 - 2M) bigrams.
+    """
+    total = length1 + length2
+    matches = math.ceil(threshold * total / 2 - 1e-9)
+    return 3 * matches - 1 - total
+
+
+def max_similarity(shared_bigrams, length1, length2):
+    """Return the highest score two names sharing the given number of bigrams can reach.
+
+    By the same argument as min_shared_bigrams, M matching characters need
+    M <= (shared_bigrams + 1 + length1 + length2) / 3, and M cannot exceed
+    the shortest length. The containment ratio never exceeds this bound.
+    """
+    total = length1 + length2
+    matches = min((shared_bigrams + 1 + total) // 3, length1, length2)
+    return 2.0 * matches / total if total else 0.0
+
+
+def similarity_score(normalized_name1, normalized_name2):
+    """Return the best of the sequence similarity and the containment ratio of two normalized names"""
+    similarity = difflib.SequenceMatcher(None, normalized_name1, normalized_name2).ratio()
+
+    # Check if one name is contained in the other
+    contains_score = 0.0
+    if normalized_name1 in normalized_name2:
+        contains_score = len(normalized_name1) / len(normalized_name2)
+    elif normalized_name2 in normalized_name1:
+        contains_score = len(normalized_name2) / len(normalized_name1)
+    return max(similarity, contains_score)
+
+
+def token_sort_score(normalized_name1, normalized_name2):
+    """Return the similarity of two normalized names, whatever the order of their words"""
+    return max(
+        similarity_score(normalized_name1, normalized_name2),
+        similarity_score(' '.join(sorted(normalized_name1.split())), ' '.join(sorted(normalized_name2.split())))
+    )
+
+
+class EmployeeNameIndex(object):
+    """Precomputed normalized names of the active employees, in search order.
+
+    Each entry is a tuple (employee id, name, normalized name, token set,
+    word count).
+    The index is immutable once built, so it can be shared by all the
+    requests of a registry. An inverted index of the bigrams of the names
+    shortlists the candidates of an automatic match and orders the
+    candidates of a suggestion.
+    """
+
+    def __init__(self, employees):
+        """Build the index from (employee id, name, normalized name) tuples"""
+        entries = []
+        postings = defaultdict(list)
+        lengths = defaultdict(list)
+        for employee_id, name, normalized in employees:
+            normalized = normalized or normalize_name(name)
+            words = normalized.split()
+            for gram, count in name_bigrams(normalized).items():
+                postings[gram].append((len(entries), count))
+            if not is_name_too_short(normalized):
+                lengths[len(normalized)].append(len(entries))
+            entries.append((employee_id, name or '', normalized, frozenset(words), len(words)))
+        self.entries = tuple(entries)
+        self._postings = dict(postings)
+        # Entries long enough to be scored, by length of their normalized name
+        self._lengths = dict(lengths)
+
+    def _shared_bigrams(self, normalized_name):
+        """Return the number of bigrams shared with the name by each entry sharing at least one"""
+        shared = defaultdict(int)
+        for gram, count in name_bigrams(normalized_name).items():
+            for index, entry_count in self._postings.get(gram, ()):
+                shared[index] += min(count, entry_count)
+        return shared
+
+    def _candidates(self, normalized_name, threshold):
+        """Return, in index order, the entries that may score at least the threshold against a name.
+
+        Only the entries sharing enough bigrams with the name for its sequence
+        similarity or containment ratio to reach the threshold are kept, the
+        others cannot reach it.
+        """
+        shared = self._shared_bigrams(normalized_name)
+        length = len(normalized_name)
+        candidates = []
+        for index in sorted(shared):
+            # Automatic matches need at least two words
+            if self.entries[index][4] < 2:
+                continue
+            entry_length = len(self.entries[index][2])
+            shortest = min(length, entry_length)
+            # Both scores need the shortest name to be long enough
+            if 2 * shortest < threshold * (length + entry_length) - 1e-9:
+                continue
+            # A contained name shares all its bigrams
+            if shared[index] >= min_shared_bigrams(length, entry_length, threshold) or \
+                    shared[index] >= shortest - 1:
+                candidates.append(self.entries[index])
+        return candidates
+
+    def __len__(self):
+        return len(self.entries)
+
+    def best_match(self, normalized_name, threshold=0.0):
+        """Return (employee id, score) of the best scored employee with at least two words in their name.
+
+        With a threshold, only the shortlisted candidates are scored: the
+        best match is the same whenever it reaches the threshold.
+        """
+        best_id = None
+        best_score = 0.0
+        entries = self._candidates(normalized_name, threshold) if threshold > 0 else self.entries
+        for employee_id, name, normalized, tokens, word_count in entries:
+            # Check that the employee name contains at least two words
+            if word_count < 2:
+                continue
+            score = similarity_score(normalized_name, normalized)
+            if score > best_score:
+                best_score = score
+                best_id = employee_id
+        return best_id, best_score
+
+    def score(self, normalized_name, entry):
+        """Return the score of a normalized name against an entry, 0 for names too short to be compared"""
+        normalized = entry[2]
+        if is_name_too_short(normalized_name) or is_name_too_short(normalized):
+            return 0.0
+        return similarity_score(normalized_name, normalized)
+
+    def top_matches(self, normalized_name, limit=3, min_score=0.3, exclude=()):
+        """Return the best scored entries for a name as (entry, score), best first, then in index order.
+
+        The result is the same as scoring every entry, the employees of
+        `exclude` left out. The entries are visited by decreasing bound of
+        their score, given by their length and the bigrams they share with
+        the name, until the bound falls below the `limit`-th best score.
+        """
+        if is_name_too_short(normalized_name) or limit <= 0:
+            return []
+        length = len(normalized_name)
+        shared = self._shared_bigrams(normalized_name)
+        # One bound per entry sharing bigrams, one per length for the others
+        bounds = [
+            (-max_similarity(count, length, len(self.entries[index][2])), index, None)
+            for index, count in shared.items() if not is_name_too_short(self.entries[index][2])
+        ]
+        bounds += [(-max_similarity(0, length, entry_length), -1, entry_length) for entry_length in self._lengths]
+        heapq.heapify(bounds)
+
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq2(normalized_name)
+        matches = []
+        lowest = min_score
+        while bounds:
+            bound, index, entry_length = heapq.heappop(bounds)
+            if -bound < lowest - 1e-9:
+                break
+            if entry_length is None:
+                indexes = [index]
+            else:
+                indexes = [index for index in self._lengths[entry_length] if index not in shared]
+            for index in indexes:
+                entry = self.entries[index]
+                if entry[0] in exclude:
+                    continue
+                # The character counts bound the score at a fraction of its cost
+                matcher.set_seq1(entry[2])
+                if matcher.quick_ratio() < lowest - 1e-9:
+                    continue
+                score = self.score(normalized_name, entry)
+                if score < min_score:
+                    continue
+                matches.append((-score, index))
+                if len(matches) >= limit:
+                    matches = heapq.nsmallest(limit, matches)
+                    lowest = max(min_score, -matches[-1][0])
+        matches.sort()
+        return [(self.entries[index], -score) for score, index in matches[:limit]]
+
+
+# Name index of a matching worker process, built once from the snapshot it receives
+_worker_index = None
+
+
+def _init_match_worker(employees):
+    global _worker_index
+    _worker_index = EmployeeNameIndex(employees)
+
+
+def _match_chunk(normalized_names, threshold):
+    return [_worker_index.best_match(normalized_name, threshold) for normalized_name in normalized_names]
+
+
+def best_matches(normalized_names, name_index, threshold):
+    """Return the (employee id, score) best match of each normalized name, in order.
+
+    From PARALLEL_MATCH_MIN_NAMES names, a snapshot of the index entries is
+    sent once to a pool of worker processes which score the names on all
+    cores. The names are scored one by one if no process can be started.
+    """
+    normalized_names = list(normalized_names)
+    workers = min(os.cpu_count() or 1, math.ceil(len(normalized_names) / PARALLEL_MATCH_CHUNK_SIZE))
+    if len(normalized_names) >= PARALLEL_MATCH_MIN_NAMES and workers > 1:
+        snapshot = [(employee_id, name, normalized) for employee_id, name, normalized, tokens, word_count
+                    in name_index.entries]
+        chunks = [normalized_names[start:start + PARALLEL_MATCH_CHUNK_SIZE]
+                  for start in range(0, len(normalized_names), PARALLEL_MATCH_CHUNK_SIZE)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker,
+                                     initargs=(snapshot,)) as pool:
+                return [match for chunk_matches in pool.map(_match_chunk, chunks, [threshold] * len(chunks))
+                        for match in chunk_matches]
+        except (OSError, BrokenProcessPool) as e:
+            _logger.warning("Parallel name matching unavailable, scoring names one by one: %s", e)
+    return [name_index.best_match(normalized_name, threshold) for normalized_name in normalized_names]
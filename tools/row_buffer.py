@@ -0,0 +1,106 @@
+from array import array
+from datetime import date, datetime, timedelta
+import sys
+
+# Text fields of a parsed row, stored as interned strings
+STRING_FIELDS = ('employee_name', 'display_id', 'payroll_id', 'department', 'dept_code', 'in_note', 'out_note')
+
+# Numeric fields of a parsed row, stored as C doubles
+FLOAT_FIELDS = ('reg_hours', 'ot1_hours', 'ot2_hours', 'total_hours')
+
+EPOCH = datetime(1970, 1, 1)
+
+# Marker of a missing date or datetime in the integer arrays
+NO_VALUE = -1
+
+
+class ClockRowBuffer(object):
+    """Columnar in-memory store of the parsed rows of a clock export.
+
+    A row costs a few array slots instead of a dictionary: datetimes are
+    kept as epoch seconds, dates as ordinals, hours as doubles and the
+    strings are interned, so that a name repeated on thousands of rows is
+    stored once. Rows are appended and read back as (line number, values,
+    error) like the rows yielded by iter_clock_rows, the values of a row
+    being only rebuilt as a dictionary when it is read.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._line_nums = array('l')
+        self._strings = {field: [] for field in STRING_FIELDS}
+        self._floats = {field: array('d') for field in FLOAT_FIELDS}
+        self._dates = array('l')
+        self._check_ins = array('q')
+        self._check_outs = array('q')
+        self._fingerprints = []
+        self._errors = {}
+
+    def __len__(self):
+        return len(self._line_nums)
+
+    def __iter__(self):
+        for index in range(len(self._line_nums)):
+            yield self._line_nums[index], self.get_vals(index), self._errors.get(index)
+
+    def append(self, line_num, vals, error=None):
+        """Store a parsed row, `vals` being None for the rows without check-in or in error"""
+        index = len(self._line_nums)
+        self._line_nums.append(line_num)
+        if error:
+            self._errors[index] = error
+
+        vals = vals or {}
+        intern = sys.intern
+        for field in STRING_FIELDS:
+            self._strings[field].append(intern(vals.get(field) or ''))
+        for field in FLOAT_FIELDS:
+            self._floats[field].append(vals.get(field) or 0.0)
+        row_date = vals.get('date')
+        self._dates.append(row_date.toordinal() if row_date else NO_VALUE)
+        self._check_ins.append(self._to_epoch(vals.get('check_in')))
+        self._check_outs.append(self._to_epoch(vals.get('check_out')))
+        self._fingerprints.append(vals.get('row_fingerprint'))
+
+    @staticmethod
+    def _to_epoch(value):
+        return int((value - EPOCH).total_seconds()) if value else NO_VALUE
+
+    @staticmethod
+    def _from_epoch(value):
+        return EPOCH + timedelta(seconds=value) if value != NO_VALUE else False
+
+    def get_vals(self, index, extra=None):
+        """Rebuild the values of a row, None if it had none"""
+        check_in = self._check_ins[index]
+        if check_in == NO_VALUE:
+            return None
+        vals = {field: self._strings[field][index] for field in STRING_FIELDS}
+        for field in FLOAT_FIELDS:
+            vals[field] = self._floats[field][index]
+        row_date = self._dates[index]
+        vals['date'] = date.fromordinal(row_date) if row_date != NO_VALUE else False
+        vals['check_in'] = self._from_epoch(check_in)
+        vals['check_out'] = self._from_epoch(self._check_outs[index])
+        if self._fingerprints[index]:
+            vals['row_fingerprint'] = self._fingerprints[index]
+        if extra:
+            vals.update(extra)
+        return vals
+
+    def get_fingerprint(self, index):
+        return self._fingerprints[index]
+
+    def get_check_out(self, index):
+        return self._from_epoch(self._check_outs[index])
+
+    def iter_vals(self, indexes=None, extra=None):
+        """Yield the values of the rows at `indexes` (all the rows by default), completed with `extra`"""
+        if indexes is None:
+            indexes = range(len(self._line_nums))
+        for index in indexes:
+            vals = self.get_vals(index, extra)
+            if vals is not None:
+                yield vals
@@ -1,2 +1,5 @@
 from . import fingerprt_hr_attendance_report_export
 from . import fingerprt_hr_select_employees
+from . import fingerprt_hr_import_preview
+from . import fingerprt_hr_import_batch
+from . import fingerprt_hr_mapping_dictionary
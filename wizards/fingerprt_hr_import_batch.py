@@ -0,0 +1,150 @@
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import base64
+import io
+import logging
+import os
+import zipfile
+
+from ..tools.clock_rows import parse_clock_data
+from ..tools.file_stream import is_clock_file_name
+
+_logger = logging.getLogger(__name__)
+
+
+class FingerprtHrImportBatch(models.TransientModel):
+    _name = 'fingerprt_hr.import.batch'
+    _description = 'Batch Import'
+
+    attachment_ids = fields.Many2many('ir.attachment', string='Files', required=True,
+                                      help="Clock exports (.csv, .tsv, .txt, .xlsx, possibly compressed as .gz or .zst), "
+                                           "or zip archives holding one export per site")
+    location_id = fields.Many2one('fingerprt_hr.location', string='Default Location')
+    guess_location = fields.Boolean(string='Location From File Name', default=True,
+                                    help="Use the location whose name appears in the file name, "
+                                         "the default location otherwise")
+    profile_id = fields.Many2one('fingerprt_hr.import.profile', string='File Format',
+                                 default=lambda self: self.env['fingerprt_hr.import']._get_default_profile())
+    load_method = fields.Selection([
+        ('orm', 'Standard'),
+        ('copy', 'Fast load (trusted files)'),
+        ('staging', 'Staging pipeline (trusted files)')
+    ], string='Load Method', default='orm', required=True)
+
+    def _get_files(self):
+        """Return (file name, content) for each clock export, extracting the zip archives"""
+        files = []
+        for attachment in self.attachment_ids:
+            data = base64.b64decode(attachment.datas or b'')
+            name = attachment.name or ''
+            if name.lower().endswith('.zip'):
+                try:
+                    archive = zipfile.ZipFile(io.BytesIO(data))
+                except zipfile.BadZipFile:
+                    raise UserError(_("The file '%s' is not a valid zip archive.") % name)
+                for info in archive.infolist():
+                    if not info.is_dir() and is_clock_file_name(info.filename):
+                        files.append((os.path.basename(info.filename), archive.read(info)))
+            elif is_clock_file_name(name):
+                files.append((name, data))
+            else:
+                raise UserError(_("Only clock exports and zip archives are accepted."))
+        if not files:
+            raise UserError(_("No clock export found."))
+        return files
+
+    def _find_location(self, file_name, locations):
+        """Return the location whose name appears in the file name, the default location otherwise"""
+        if self.guess_location:
+            lower_name = file_name.lower()
+            matches = [location for location in locations if location.name.lower() in lower_name]
+            if matches:
+                return max(matches, key=lambda location: len(location.name))
+        return self.location_id
+
+    def _parse_files(self, files):
+        """Parse the (file name, content) files on all cores, outside of any database cursor.
+
+        Return (rows, error) for each file, see parse_clock_data.
+        """
+        spec = self.profile_id._get_spec() if self.profile_id else None
+        names = [file_name for file_name, data in files]
+        datas = [data for file_name, data in files]
+        workers = min(len(files), os.cpu_count() or 1)
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(parse_clock_data, datas, names, [spec] * len(files)))
+            except (OSError, BrokenProcessPool) as e:
+                _logger.warning("Parallel parsing unavailable, parsing files one by one: %s", e)
+        return [parse_clock_data(data, file_name, spec) for file_name, data in files]
+
+    def action_import(self):
+        """Create one import per file and load the files parsed in parallel.
+
+        The files are parsed before anything is written, an unreadable file
+        gives an import in error. The uploaded files are only deleted once
+        all of them are parsed.
+        """
+        self.ensure_one()
+        files = self._get_files()
+        auto_commit = not self.env.registry.in_test_mode()
+        locations = self.env['fingerprt_hr.location'].search([])
+        parsed_files = self._parse_files(files)
+
+        imports = self.env['fingerprt_hr.import']
+        failed = []
+        for (file_name, data), (rows, error) in zip(files, parsed_files):
+            import_record = imports.create({
+                'name': file_name,
+                'file': base64.b64encode(data),
+                'file_name': file_name,
+                'location_id': self._find_location(file_name, locations).id,
+                'profile_id': self.profile_id.id,
+                'load_method': self.load_method,
+            })
+            if error:
+                import_record.state = 'error'
+                import_record.message_post(body=_("Erreur lors de l'import : %s") % error)
+                failed.append(file_name)
+            imports |= import_record
+        self.attachment_ids.unlink()
+        if auto_commit:
+            self.env.cr.commit()
+
+        for import_record, (rows, error) in zip(imports, parsed_files):
+            if error:
+                continue
+            try:
+                import_record._run_import(rows)
+            except UserError:
+                failed.append(import_record.name)
+            if auto_commit:
+                self.env.cr.commit()
+
+        action = {
+            'name': _('Batch Import'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'fingerprt_hr.import',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', imports.ids)],
+            'context': {'create': False},
+        }
+        if not failed:
+            return action
+
+        _logger.warning("Batch import failed for: %s", ', '.join(failed))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Batch Import'),
+                'message': _("%d of %d files could not be imported, see their chatter: %s") % (
+                    len(failed), len(imports), ', '.join(failed)),
+                'sticky': True,
+                'type': 'warning',
+                'next': action,
+            }
+        }
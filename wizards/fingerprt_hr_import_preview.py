@@ -0,0 +1,49 @@
+from odoo import api, fields, models, _
+
+
+class FingerprtHrImportPreview(models.TransientModel):
+    _name = 'fingerprt_hr.import.preview'
+    _description = 'Import Preview'
+
+    import_id = fields.Many2one('fingerprt_hr.import', string='Import', required=True, ondelete='cascade')
+    row_limit = fields.Integer(string='Maximum Rows', default=0,
+                               help="Stop after this number of analysed rows, 0 to read the whole file")
+    sample_rate = fields.Float(string='Sampled Fraction', default=1.0,
+                               help="Fraction of the rows analysed, 1 to analyse every row")
+
+    # Results
+    preview_done = fields.Boolean(string='Preview Done', readonly=True)
+    rows_read = fields.Integer(string='Rows Analysed', readonly=True)
+    rows_valid = fields.Integer(string='Valid Rows', readonly=True)
+    rows_ignored = fields.Integer(string='Rows Without Check-in', readonly=True)
+    error_count = fields.Integer(string='Parse Errors', readonly=True)
+    distinct_names = fields.Integer(string='Distinct Names', readonly=True)
+    mapped_names = fields.Integer(string='Names With Mapping', readonly=True)
+    mapped_rows = fields.Integer(string='Rows With Mapping', readonly=True)
+    mapping_hit_rate = fields.Float(string='Mapping Hit Rate (%)', readonly=True, digits=(16, 1))
+    date_from = fields.Date(string='First Date', readonly=True)
+    date_to = fields.Date(string='Last Date', readonly=True)
+    error_details = fields.Text(string='Error Details', readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super(FingerprtHrImportPreview, self).default_get(fields_list)
+        if self.env.context.get('active_model') == 'fingerprt_hr.import' and self.env.context.get('active_id'):
+            res['import_id'] = self.env.context.get('active_id')
+        return res
+
+    def action_preview(self):
+        """Analyse the file of the import and display the statistics"""
+        self.ensure_one()
+        stats = self.import_id._preview_file(self.row_limit, self.sample_rate)
+        stats['preview_done'] = True
+        self.write(stats)
+        
+        return {
+            'name': _('Import Preview'),
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,228 @@
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import logging
+
+from ..tools.file_stream import Base64ChunkReader, open_text_stream
+from ..tools.name_matching import normalize_name, phonetic_key
+
+_logger = logging.getLogger(__name__)
+
+# Number of invalid lines detailed when a dictionary is rejected
+MAX_REPORTED_ERRORS = 20
+
+# Header of the exported dictionaries
+DICTIONARY_HEADER = ['Imported Name', 'Employee Reference']
+
+
+class FingerprtHrMappingDictionary(models.TransientModel):
+    _name = 'fingerprt_hr.mapping.dictionary'
+    _description = 'Mapping Dictionary Import/Export'
+
+    file = fields.Binary(string='Dictionary File',
+                         help="CSV file of (imported name, employee reference) rows. The reference is the "
+                              "badge ID, the barcode or the name of the employee")
+    file_name = fields.Char(string='File Name')
+    delimiter = fields.Char(string='Delimiter', default=',', required=True)
+    has_header = fields.Boolean(string='Header Row', default=True)
+    export_file = fields.Binary(string='Exported Dictionary', readonly=True)
+    export_file_name = fields.Char(string='Exported File Name', readonly=True)
+
+    def _read_rows(self):
+        """Return (line number, imported name, employee reference) for each row of the file"""
+        if not self.file:
+            raise UserError(_("Please select a dictionary file to import."))
+        reader = csv.reader(open_text_stream(Base64ChunkReader(self.file), 'utf-8-sig'),
+                            delimiter=self.delimiter or ',')
+        rows = []
+        for row in reader:
+            if self.has_header and reader.line_num == 1:
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+            cells = [cell.strip() for cell in row[:2]] + ['', '']
+            rows.append((reader.line_num, cells[0], cells[1]))
+        return rows
+
+    @api.model
+    def _get_employee_reference_index(self):
+        """Return the active employee of each badge ID, barcode and unambiguous name"""
+        index = {}
+        ambiguous = set()
+        for employee in self.env['hr.employee'].search_read([], ['name']):
+            name = (employee['name'] or '').strip()
+            if index.setdefault(name, employee['id']) != employee['id']:
+                ambiguous.add(name)
+        for name in ambiguous:
+            del index[name]
+        # Identifiers take precedence over names
+        index.update(self.env['fingerprt_hr.import']._get_employee_id_index())
+        return index
+
+    def _validate_rows(self, rows):
+        """Check the rows against the mappings and the one name per employee rule.
+
+        Return the (line number, name, employee id) of the mappings to load,
+        without the ones already mapped. Raise a UserError listing the
+        invalid lines.
+        """
+        references = self._get_employee_reference_index()
+        self.env['fingerprt_hr.employee.mapping'].flush(['name', 'employee_id', 'active'])
+        self.env.cr.execute("SELECT name, employee_id FROM fingerprt_hr_employee_mapping WHERE active")
+        mapped_names = {}
+        mapped_employees = {}
+        for name, employee_id in self.env.cr.fetchall():
+            mapped_names[name] = employee_id
+            mapped_employees[employee_id] = name
+
+        errors = []
+        pairs = {}
+        line_nums = {}
+        file_employees = {}
+        for line_num, name, reference in rows:
+            if not name or not reference:
+                errors.append(_("Line %d: the imported name and the employee reference are required") % line_num)
+                continue
+            employee_id = references.get(reference)
+            if not employee_id:
+                errors.append(_("Line %d: no employee found for '%s'") % (line_num, reference))
+                continue
+            if pairs.setdefault(name, employee_id) != employee_id:
+                errors.append(_("Line %d: '%s' is mapped to several employees in the file") % (line_num, name))
+                continue
+            line_nums.setdefault(name, line_num)
+            if file_employees.setdefault(employee_id, name) != name:
+                errors.append(_("Line %d: employee '%s' is also mapped to '%s' in the file") % (
+                    line_num, reference, file_employees[employee_id]))
+                continue
+            if mapped_names.get(name, employee_id) != employee_id:
+                errors.append(_("Line %d: an active mapping already exists for name '%s'") % (line_num, name))
+                continue
+            if mapped_employees.get(employee_id, name) != name:
+                errors.append(_("Line %d: employee '%s' already has an active mapping with name '%s'") % (
+                    line_num, reference, mapped_employees[employee_id]))
+
+        self._check_errors(errors)
+        return [(line_nums[name], name, employee_id) for name, employee_id in pairs.items()
+                if name not in mapped_names]
+
+    @api.model
+    def _check_errors(self, errors):
+        """Raise a UserError listing the first errors, if any"""
+        if errors:
+            message = '\n'.join(errors[:MAX_REPORTED_ERRORS])
+            if len(errors) > MAX_REPORTED_ERRORS:
+                message += '\n' + _("... and %d other errors") % (len(errors) - MAX_REPORTED_ERRORS)
+            raise UserError(_("The dictionary was not loaded:\n%s") % message)
+
+    def _load_mappings(self, mappings):
+        """Reactivate the matching inactive mappings and insert the others, with one statement each.
+
+        Return the number of reactivated and created mappings. Raise a
+        UserError listing the lines whose mapping conflicts with an active
+        mapping created meanwhile.
+        """
+        if not mappings:
+            return 0, 0
+        Mapping = self.env['fingerprt_hr.employee.mapping']
+        Mapping.flush()
+        now = fields.Datetime.now()
+        names = [name for line_num, name, employee_id in mappings]
+        employee_ids = [employee_id for line_num, name, employee_id in mappings]
+
+        self.env.cr.execute("""
+            UPDATE fingerprt_hr_employee_mapping m
+            SET active = TRUE, import_count = m.import_count + 1, last_used = %(now)s,
+                write_uid = %(uid)s, write_date = %(now)s
+            FROM (
+                SELECT unnest(%(names)s::varchar[]) AS name, unnest(%(employee_ids)s::int[]) AS employee_id
+            ) u
+            WHERE m.name = u.name AND m.employee_id = u.employee_id AND NOT m.active
+            RETURNING m.name
+        """, {'now': now, 'uid': self.env.uid, 'names': names, 'employee_ids': employee_ids})
+        reactivated = {row[0] for row in self.env.cr.fetchall()}
+
+        new_mappings = [mapping for mapping in mappings if mapping[1] not in reactivated]
+        self.env.cr.execute("""
+            INSERT INTO fingerprt_hr_employee_mapping (
+                name, employee_id, normalized_name, phonetic_key, active, import_count, last_used, notes,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT u.name, u.employee_id, NULLIF(u.normalized_name, ''), NULLIF(u.phonetic_key, ''),
+                   TRUE, 1, %(now)s, %(notes)s, %(uid)s, %(now)s, %(uid)s, %(now)s
+            FROM unnest(%(names)s::varchar[], %(employee_ids)s::int[], %(normalized_names)s::varchar[],
+                        %(phonetic_keys)s::varchar[]) AS u(name, employee_id, normalized_name, phonetic_key)
+            ON CONFLICT DO NOTHING
+            RETURNING id, name
+        """, {
+            'now': now,
+            'uid': self.env.uid,
+            'notes': _("Loaded from the mapping dictionary %s") % (self.file_name or ''),
+            'names': [name for line_num, name, employee_id in new_mappings],
+            'employee_ids': [employee_id for line_num, name, employee_id in new_mappings],
+            'normalized_names': [normalize_name(name) for line_num, name, employee_id in new_mappings],
+            'phonetic_keys': [phonetic_key(name) for line_num, name, employee_id in new_mappings],
+        })
+        created = dict((name, mapping_id) for mapping_id, name in self.env.cr.fetchall())
+        # The rows skipped on conflict were mapped by another transaction since the validation
+        self._check_errors([
+            _("Line %d: an active mapping already exists for name '%s' or its employee") % (line_num, name)
+            for line_num, name, employee_id in new_mappings if name not in created
+        ])
+        created_ids = list(created.values())
+        Mapping.invalidate_cache()
+        # Lines already mapped under these names belong to the new mappings
+        Mapping._link_imports(mapping_ids=created_ids)
+        return len(reactivated), len(created_ids)
+
+    def action_import(self):
+        """Validate the whole dictionary, then load it"""
+        self.ensure_one()
+        rows = self._read_rows()
+        mappings = self._validate_rows(rows)
+        reactivated_count, created_count = self._load_mappings(mappings)
+        unchanged_count = len(rows) - reactivated_count - created_count
+        _logger.info("Mapping dictionary %s: %d created, %d reactivated, %d unchanged",
+                     self.file_name, created_count, reactivated_count, unchanged_count)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Mapping Dictionary Loaded'),
+                'message': _("%d mappings created, %d reactivated, %d unchanged") % (
+                    created_count, reactivated_count, unchanged_count),
+                'sticky': False,
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
+
+    def action_export(self):
+        """Export the active mappings, with the badge ID, the barcode or the name of their employee"""
+        self.ensure_one()
+        self.env['fingerprt_hr.employee.mapping'].flush(['name', 'employee_id', 'active'])
+        self.env.cr.execute("""
+            SELECT m.name, COALESCE(NULLIF(e.badge_id, ''), NULLIF(e.barcode, ''), e.name)
+            FROM fingerprt_hr_employee_mapping m
+            JOIN hr_employee e ON e.id = m.employee_id
+            WHERE m.active
+            ORDER BY m.name
+        """)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter or ',')
+        writer.writerow(DICTIONARY_HEADER)
+        writer.writerows(self.env.cr.fetchall())
+
+        self.write({
+            'export_file': base64.b64encode(buffer.getvalue().encode('utf-8')),
+            'export_file_name': 'employee_mappings.csv',
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/?model=%s&id=%d&field=export_file&filename_field=export_file_name&download=true' % (
+                self._name, self.id),
+            'target': 'self',
+        }
@@ -3,6 +3,8 @@ from odoo.exceptions import UserError
 from collections import defaultdict
 import logging
 
+from ..tools.name_matching import MATCH_THRESHOLD
+
 _logger = logging.getLogger(__name__)
 
 class FingerprtHrSelectEmployees(models.TransientModel):
@@ -39,6 +41,14 @@ class FingerprtHrSelectEmployees(models.TransientModel):
                 if line.employee_name:  # Ensure the name is not empty
                     lines_by_name[line.employee_name].append(line)
             
+            # Best employee of each name among the employees without mapping,
+            # the ones scored as an automatic match are preselected
+            mapped_employee_ids = [mapping['employee_id'][0] for mapping in self.env[
+                'fingerprt_hr.employee.mapping'].search_read([('active', '=', True)], ['employee_id'])]
+            suggestions = import_record._suggest_employees(
+                list(lines_by_name), limit=1, exclude_employee_ids=mapped_employee_ids)
+            preselected = set()
+            
             # Create a single wizard line per employee name
             line_vals = []
             for employee_name, lines in lines_by_name.items():
@@ -49,14 +59,23 @@ class FingerprtHrSelectEmployees(models.TransientModel):
                 if not import_line_ids:  # Do not create a line if there are no import lines
                     continue
                     
-                line_vals.append((0, 0, {
+                suggested_employee, suggestion_score = (suggestions.get(employee_name) or [(False, 0.0)])[0]
+                vals = {
                     'employee_name': employee_name,
                     'line_count': len(lines),
                     'reference_line_id': reference_line.id,
                     'import_line_ids': [(6, 0, import_line_ids)],
                     'check_in': reference_line.check_in,
                     'check_out': reference_line.check_out,
-                }))
+                    'suggested_employee_id': suggested_employee and suggested_employee.id,
+                    'suggestion_score': suggestion_score,
+                }
+                # An employee can only be selected for one name
+                if suggested_employee and suggestion_score >= MATCH_THRESHOLD \
+                        and suggested_employee.id not in preselected:
+                    vals['employee_id'] = suggested_employee.id
+                    preselected.add(suggested_employee.id)
+                line_vals.append((0, 0, vals))
             
             res['line_ids'] = line_vals
             res['mapped_count'] = len(import_record.line_ids) - len(unmapped_lines)
@@ -174,6 +193,8 @@ class FingerprtHrSelectEmployeesLine(models.TransientModel):
     import_line_ids = fields.Many2many('fingerprt_hr.import.line', string='Import lines associated')
     employee_name = fields.Char(string='Imported name', readonly=True)
     employee_id = fields.Many2one('hr.employee', string='Employee')
+    suggested_employee_id = fields.Many2one('hr.employee', string='Suggestion', readonly=True)
+    suggestion_score = fields.Float(string='Score', readonly=True, digits=(3, 2))
     check_in = fields.Datetime(string='Check-in (example)', readonly=True)
     check_out = fields.Datetime(string='Check-out (example)', readonly=True)
     create_mapping = fields.Boolean(string='Create mapping', default=True)